@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from tsp_ga import GA, City
+from tsp_instance import TSPInstance
+from tsp_checkpoint import save_checkpoint, load_checkpoint
+
+
+MUTATION_TYPES = ['swap', 'inversion', 'scramble', 'insertion']
+
+
+def make_ga(mutation_type='swap', mutation_rate=0.25, n=30, population_size=200, **options):
+    rng = np.random.default_rng(1)
+    cities = [City(str(i), x, y) for i, (x, y) in enumerate(rng.random((n, 2)) * 100)]
+    ga = GA(population_size=population_size, mutation_rate=mutation_rate, mutation_type=mutation_type, seed=2,
+            **options)
+    ga.select_population(cities)
+    return ga
+
+
+def copies_of_parent(ga):
+    # Quần thể gồm các bản sao (fancy indexing) của cùng một cá thể cha như trong evolve
+    parent = ga.population[0].copy()
+    population = ga.population[np.zeros(len(ga.population), dtype=np.intp)]
+    fitness = np.full(len(population), ga.fitness[0])
+    return parent, population, fitness
+
+
+@pytest.mark.parametrize('mutation_type', MUTATION_TYPES)
+def test_mutation_stage_does_not_alias_rows(mutation_type):
+    ga = make_ga(mutation_type)
+    parent, population, fitness = copies_of_parent(ga)
+    original = ga.population.copy()
+
+    indices = ga.mutation_stage(population, fitness)
+
+    untouched = np.setdiff1d(np.arange(len(population)), indices)
+    assert len(untouched) > 0
+    np.testing.assert_array_equal(population[untouched], np.broadcast_to(parent, (len(untouched), len(parent))))
+    np.testing.assert_array_equal(ga.population, original)
+
+
+@pytest.mark.parametrize('mutation_type', MUTATION_TYPES)
+def test_mutation_stage_delta_fitness_matches_full_evaluation(mutation_type):
+    ga = make_ga(mutation_type)
+    parent, population, fitness = copies_of_parent(ga)
+
+    ga.mutation_stage(population, fitness)
+
+    np.testing.assert_allclose(fitness, ga.calc_population_fitness(population))
+
+
+@pytest.mark.parametrize('mutation_rate', [0.0, 0.1, 0.25, 1.0])
+def test_mutation_stage_calls_mutation_once_per_mutation(mutation_rate):
+    ga = make_ga('swap', mutation_rate)
+    parent, population, fitness = copies_of_parent(ga)
+    calls = []
+    mutation = ga.mutation
+
+    def counting_mutation(state):
+        calls.append(1)
+        return mutation(state)
+
+    ga.mutation = counting_mutation
+    ga.mutation_stage(population, fitness)
+
+    assert len(calls) == round(mutation_rate * len(population))
+    assert ga.delta_evaluations == len(calls)
+
+
+def test_list_tour_shares_cache_key_with_population(tmp_path):
+    ga = make_ga(cache_size=1000)
+    size, hits = len(ga.cache), ga.cache.hits
+
+    assert ga.calc_fitness(ga.population[3].tolist()) == ga.fitness[3]
+    assert ga.cache.hits == hits + 1
+    assert len(ga.cache) == size
+
+    save_checkpoint(ga, tmp_path / 'ga.npz')
+    assert list(load_checkpoint(tmp_path / 'ga.npz').cache.entries) == list(ga.cache.entries)
+
+
+def test_run_does_not_build_city_objects():
+    instance = TSPInstance(np.random.default_rng(0).random((50, 2)), None, 'EUC_2D')
+    ga = GA(population_size=20, seed=0)
+
+    result = ga.run(instance, max_generations=3)
+
+    assert instance._cities is None
+    assert result['tour'] == instance.names[result['state']].tolist()
@@ -0,0 +1,21 @@
+import pytest
+from tsp_instance import load_instance
+
+
+def test_load_csv_reads_quoted_and_hash_names(tmp_path):
+    path = tmp_path / 'cities.csv'
+    path.write_text('#7,1,2\n"Washington, DC",3,4\nB,5,6\n')
+
+    for _ in range(2):
+        # Lần thứ hai nạp lại từ bộ nhớ đệm .npy
+        instance = load_instance(str(path))
+        assert instance.names.tolist() == ['#7', 'Washington, DC', 'B']
+        assert instance.coords.tolist() == [[1, 2], [3, 4], [5, 6]]
+
+
+def test_load_csv_rejects_missing_columns(tmp_path):
+    path = tmp_path / 'cities.csv'
+    path.write_text('A,1\nB,2\nC,3\n')
+
+    with pytest.raises(ValueError, match='name,x,y'):
+        load_instance(str(path))
@@ -0,0 +1,136 @@
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from functools import partial
+import numpy as np
+from tsp_ga import GA, City
+
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+CROSSOVER_TYPES = ['OX', 'PMX', 'CX']
+MUTATION_TYPES = ['swap', 'inversion', 'scramble', 'insertion']
+
+
+def synthetic_cities(n, seed):
+    coords = np.random.default_rng(seed).uniform(0, 1000, size=(n, 2))
+    return [City(str(i), x, y) for i, (x, y) in enumerate(coords)]
+
+
+def measure(func, min_time=0.2, repeat=3):
+    # Tăng số lần lặp cho đến khi một lượt chạy đủ min_time, lấy lượt nhanh nhất trong repeat lượt
+    loops = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time * 1e9 or loops >= 1 << 20:
+            break
+        loops *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            func()
+        best = min(best, time.perf_counter_ns() - start)
+    return best / loops
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def hot_paths(n, seed, population_size):
+    # Mỗi phép đo là một hàm không tham số; trạng thái được chuẩn bị sẵn bên ngoài phần đo
+    cities = synthetic_cities(n, seed)
+    ga = GA(population_size=population_size, seed=seed)
+    ga.select_population(cities)
+    parent1, parent2 = ga.population[0].copy(), ga.population[1].copy()
+    parents1, parents2 = ga.population[0::2].copy(), ga.population[1::2].copy()
+
+    cases = {'calc_distance': lambda: City.calc_distance(cities)}
+    for crossover_type in CROSSOVER_TYPES:
+        cases[f'crossover_{crossover_type}'] = partial(getattr(ga, f'crossover_{crossover_type}'), parent1, parent2)
+        cases[f'crossover_{crossover_type}_batch'] = partial(getattr(ga, f'crossover_{crossover_type}_batch'), parents1, parents2)
+    state = ga.population[2].copy()
+    for mutation_type in MUTATION_TYPES:
+        cases[f'{mutation_type}_mutation'] = partial(getattr(ga, f'{mutation_type}_mutation'), state)
+    cases['tournament_selection'] = ga.tournament_selection
+    cases['select_parents'] = partial(ga.select_parents, population_size)
+    cases['evolve'] = ga.evolve
+    return cases
+
+
+def run(sizes, seed, population_size, min_time, only=None):
+    results = {}
+    for n in sizes:
+        cases = hot_paths(n, seed, population_size)
+        for name, func in cases.items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            ns_per_op = measure(func, min_time)
+            record = {'ns_per_op': ns_per_op, 'peak_bytes': peak_memory(func)}
+            if name == 'evolve':
+                record['generations_per_second'] = 1e9 / ns_per_op
+            results[f'{name}/n={n}'] = record
+            print(f"{name + '/n=' + str(n):32s} {ns_per_op:14.0f} ns/op {record['peak_bytes'] / 1024:12.1f} KiB"
+                  + (f" {record['generations_per_second']:10.2f} gen/s" if name == 'evolve' else ''))
+    return results
+
+
+def compare(results, baseline, threshold):
+    # Đánh dấu hồi quy khi thời gian mới chậm hơn baseline quá threshold lần
+    regressions = []
+    for name, record in results.items():
+        if name in baseline:
+            ratio = record['ns_per_op'] / baseline[name]['ns_per_op']
+            if ratio > threshold:
+                regressions.append((name, ratio))
+                print(f"REGRESSION {name}: {ratio:.2f}x slower than baseline")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the GA hot paths")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--population', type=int, default=100, help="population size used by the GA benchmarks")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum seconds per timing run")
+    parser.add_argument('--only', nargs='+', help="only run benchmarks whose name contains one of these strings")
+    parser.add_argument('--output', help="write the results as a JSON baseline")
+    parser.add_argument('--baseline', help="compare against a JSON baseline written by --output")
+    parser.add_argument('--threshold', type=float, default=1.25, help="slowdown ratio flagged as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.seed, args.population, args.min_time, args.only)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'python': platform.python_version(),
+                    'numpy': np.__version__,
+                    'machine': platform.machine(),
+                    'seed': args.seed,
+                    'population': args.population
+                },
+                'results': results
+            }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
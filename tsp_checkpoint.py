@@ -0,0 +1,141 @@
+import os
+import json
+import threading
+import numpy as np
+from tsp_ga import GA
+from tsp_instance import TSPInstance
+
+
+CHECKPOINT_VERSION = 1
+
+# Tham số khởi tạo GA được lưu cùng checkpoint để tạo lại đúng cấu hình khi chạy tiếp
+CONFIG_FIELDS = ['population_size', 'iterations_limit', 'mutation_rate', 'crossover_rate', 'crossover_type',
+                 'mutation_type', 'target', 'tournament_selection_size', 'selection_type', 'local_search',
+                 'local_search_target', 'local_search_count', 'neighbor_list_size', 'profile', 'matrix_limit',
+                 'init_type', 'init_rate']
+
+
+def snapshot(ga):
+    # Chụp toàn bộ trạng thái ảnh hưởng đến các thế hệ sau: quần thể, fitness, trạng thái bộ
+    # sinh số ngẫu nhiên, cá thể tốt nhất, bộ nhớ đệm fitness và bài toán. Phải được gọi giữa
+    # hai thế hệ trên luồng chạy GA; các mảng được sao chép nên có thể ghi ở luồng khác
+    config = {field: getattr(ga, field) for field in CONFIG_FIELDS}
+    config['cache_size'] = ga.cache.maxsize if ga.cache is not None else 0
+    meta = {
+        'version': CHECKPOINT_VERSION,
+        'config': config,
+        'rng_state': ga.rng.bit_generator.state,
+        'gen_number': ga.gen_number,
+        'fittest': float(ga.fittest),
+        'best_fitness': float(ga.best_fitness),
+        'last_improvement': ga.last_improvement,
+        'evaluations': ga.evaluations,
+        'delta_evaluations': ga.delta_evaluations,
+        'edge_weight_type': ga.instance.edge_weight_type,
+        'instance_name': ga.instance.name
+    }
+    arrays = {'population': ga.population.copy(), 'fitness': ga.fitness.copy()}
+    if ga.best_state is not None:
+        arrays['best_state'] = ga.best_state.copy()
+    for kind in ('coords', 'weights'):
+        value = getattr(ga.instance, kind)
+        if value is not None:
+            arrays[kind] = np.asarray(value)
+    arrays['names'] = np.asarray(ga.instance.names)
+    if ga.cache is not None:
+        meta['cache_hits'], meta['cache_misses'] = ga.cache.hits, ga.cache.misses
+        # Các khóa theo thứ tự LRU để bộ nhớ đệm được khôi phục đúng thứ tự loại bỏ
+        keys = b''.join(ga.cache.entries)
+        arrays['cache_keys'] = np.frombuffer(keys, dtype=ga.population.dtype).reshape(len(ga.cache), -1)
+        arrays['cache_values'] = np.array(list(ga.cache.entries.values()), dtype=float)
+    arrays['meta'] = np.array(json.dumps(meta))
+    return arrays
+
+
+def write_checkpoint(file_path, arrays):
+    # Ghi ra file tạm rồi đổi tên để checkpoint cũ luôn còn nguyên nếu tiến trình bị dừng giữa chừng
+    temp_path = f'{file_path}.tmp'
+    with open(temp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, file_path)
+
+
+def save_checkpoint(ga, file_path):
+    write_checkpoint(file_path, snapshot(ga))
+
+
+def load_checkpoint(file_path, observers=None):
+    # Tạo lại GA từ checkpoint; các thế hệ tiếp theo giống hệt như khi GA không bị dừng
+    with np.load(file_path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        if meta['version'] != CHECKPOINT_VERSION:
+            raise ValueError(f"{file_path} is a version {meta['version']} checkpoint, expected {CHECKPOINT_VERSION}")
+        arrays = {kind: data[kind] for kind in data.files if kind != 'meta'}
+
+    instance = TSPInstance(arrays.get('coords'), arrays['names'], meta['edge_weight_type'], arrays.get('weights'),
+                           name=meta['instance_name'])
+    ga = GA(observers=observers, **meta['config'])
+    ga.load_cities(instance)
+    ga.population = arrays['population']
+    ga.fitness = arrays['fitness']
+    ga.best_state = arrays.get('best_state')
+    ga.rng.bit_generator.state = meta['rng_state']
+    for field in ('gen_number', 'fittest', 'best_fitness', 'last_improvement', 'evaluations', 'delta_evaluations'):
+        setattr(ga, field, meta[field])
+    if ga.cache is not None and 'cache_keys' in arrays:
+        for key, value in zip(arrays['cache_keys'], arrays['cache_values'].tolist()):
+            ga.cache.entries[key.tobytes()] = value
+        ga.cache.hits, ga.cache.misses = meta['cache_hits'], meta['cache_misses']
+    return ga
+
+
+class CheckpointWriter:
+    # Ghi checkpoint mỗi interval thế hệ trên một luồng nền: luồng GA chỉ chụp trạng thái
+    # (sao chép mảng) rồi chạy tiếp. Nếu luồng ghi chưa xong, chỉ bản chụp mới nhất được giữ lại
+    def __init__(self, file_path, interval=10):
+        self.file_path = file_path
+        self.interval = interval
+        self.written = 0
+        self.error = None
+        self._pending = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, ga, force=False):
+        if not force and (self.interval is None or ga.gen_number % self.interval):
+            return
+        arrays = snapshot(ga)
+        with self._condition:
+            self._pending = arrays
+            self._condition.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                arrays, self._pending = self._pending, None
+            try:
+                write_checkpoint(self.file_path, arrays)
+                self.written += 1
+            except OSError as error:
+                self.error = error
+
+    def close(self):
+        # Chờ bản chụp cuối cùng được ghi xong
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
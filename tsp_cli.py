@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tsp_ga import GA
+from tsp_instance import load_instance
+from tsp_telemetry import TelemetryWriter
+from tsp_checkpoint import load_checkpoint
+
+
+INSTANCE_EXTENSIONS = ('.csv', '.tsp')
+
+# Tham số của GA và của GA.run có thể đặt bằng cờ dòng lệnh hoặc file cấu hình JSON
+GA_OPTIONS = {
+    'population_size': int, 'iterations_limit': int, 'mutation_rate': float, 'crossover_rate': float,
+    'crossover_type': str, 'mutation_type': str, 'selection_type': str, 'tournament_selection_size': int,
+    'seed': int, 'local_search': str, 'local_search_target': str, 'local_search_count': int,
+    'neighbor_list_size': int, 'cache_size': int, 'matrix_limit': int, 'init_type': str, 'init_rate': float
+}
+RUN_OPTIONS = {
+    'target_distance': float, 'stall_generations': int, 'time_budget': float, 'min_diversity': float,
+    'max_generations': int, 'checkpoint_interval': int
+}
+CHOICES = {
+    'crossover_type': ['OX', 'PMX', 'CX'],
+    'mutation_type': ['swap', 'inversion', 'scramble', 'insertion'],
+    'selection_type': ['tournament', 'roulette', 'rank'],
+    'local_search': ['2opt', 'oropt', 'both'],
+    'local_search_target': ['elite', 'offspring'],
+    'init_type': ['random', 'nearest_neighbor', 'greedy', 'space_filling_curve']
+}
+
+FIELDNAMES = ['instance', 'path', 'cities', 'distance', 'generations', 'evaluations', 'elapsed', 'stop_reason',
+              'tour', 'error']
+
+
+def find_instances(paths):
+    # Các thư mục được mở rộng thành các file .csv/.tsp bên trong (không đệ quy), theo thứ tự tên
+    instances = []
+    for path in paths:
+        if os.path.isdir(path):
+            instances.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                             if os.path.splitext(name)[1].lower() in INSTANCE_EXTENSIONS)
+        else:
+            instances.append(path)
+    return instances
+
+
+def solve(path, ga_options, run_options, checkpoint_dir=None):
+    # Giải một bài toán trong tiến trình con. Với checkpoint_dir, trạng thái được ghi vào
+    # <checkpoint_dir>/<tên file>.npz và lần chạy sau tiếp tục từ đó
+    record = dict.fromkeys(FIELDNAMES)
+    record.update(instance=os.path.basename(path), path=path)
+    try:
+        checkpoint = None
+        if checkpoint_dir is not None:
+            checkpoint = os.path.join(checkpoint_dir, os.path.basename(path) + '.npz')
+        if checkpoint is not None and os.path.exists(checkpoint):
+            ga = load_checkpoint(checkpoint)
+            result = ga.run(checkpoint=checkpoint, **run_options)
+        else:
+            ga = GA(**ga_options)
+            result = ga.run(load_instance(path), checkpoint=checkpoint, **run_options)
+    except Exception as error:
+        # Mọi lỗi của một bài toán thành bản ghi lỗi để các bài toán khác vẫn được giải
+        record['error'] = f'{type(error).__name__}: {error}'
+        return record
+
+    record.update({
+        'cities': len(ga.instance),
+        'distance': result['distance'],
+        'generations': result['generations'],
+        'evaluations': result['evaluations'],
+        'elapsed': result['elapsed'],
+        'stop_reason': result['stop_reason'],
+        'tour': result['tour']
+    })
+    return record
+
+
+def load_config(file_path):
+    with open(file_path) as f:
+        config = json.load(f)
+    unknown = set(config) - set(GA_OPTIONS) - set(RUN_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown options in {file_path}: {', '.join(sorted(unknown))}")
+    return config
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Solve TSP instances with the genetic algorithm, without a GUI")
+    parser.add_argument('paths', nargs='+', help="instance files (.csv or TSPLIB .tsp) or directories of them")
+    parser.add_argument('--config', help="JSON file of GA and run options; command-line flags take precedence")
+    parser.add_argument('--output', help="stream results to a .jsonl or .csv file (default: JSON lines on stdout)")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--checkpoint-dir', help="save each run to <dir>/<instance>.npz and resume from it if present")
+    ga_group = parser.add_argument_group("GA options")
+    for name, kind in GA_OPTIONS.items():
+        ga_group.add_argument('--' + name.replace('_', '-'), type=kind, choices=CHOICES.get(name))
+    run_group = parser.add_argument_group("stopping options")
+    for name, kind in RUN_OPTIONS.items():
+        run_group.add_argument('--' + name.replace('_', '-'), type=kind)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    options = load_config(args.config) if args.config else {}
+    options.update({name: value for name, value in vars(args).items()
+                    if (name in GA_OPTIONS or name in RUN_OPTIONS) and value is not None})
+    ga_options = {name: value for name, value in options.items() if name in GA_OPTIONS}
+    run_options = {name: value for name, value in options.items() if name in RUN_OPTIONS}
+
+    instances = find_instances(args.paths)
+    if not instances:
+        print("No instance files found", file=sys.stderr)
+        return 1
+    if args.checkpoint_dir is not None:
+        os.makedirs(args.checkpoint_dir, exist_ok=True)
+
+    # Mỗi kết quả được ghi ngay khi bài toán giải xong (TelemetryWriter flush sau mỗi bản ghi)
+    writer = TelemetryWriter(args.output) if args.output else None
+
+    failed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(solve, path, ga_options, run_options, args.checkpoint_dir) for path in instances]
+            for future in as_completed(futures):
+                record = future.result()
+                failed += record['error'] is not None
+                if writer is None:
+                    print(json.dumps(record), flush=True)
+                elif writer.format == 'csv':
+                    writer(dict(record, tour=' '.join(record['tour'] or [])))
+                else:
+                    writer(record)
+                if record['error'] is not None:
+                    print(f"{record['path']}: {record['error']}", file=sys.stderr)
+    finally:
+        if writer is not None:
+            writer.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,15 @@
-import csv
-import random
+import time
+from collections import OrderedDict
 import numpy as np
+from tsp_local_search import nearest_neighbors, improve_tour
+from tsp_instance import TSPInstance, load_instance, euclidean_matrix
+from tsp_init import initial_tours
 
 
 class City:
+    # __slots__ bỏ __dict__ của mỗi đối tượng; GA chỉ làm việc với mảng chỉ số và tạo City khi cần hiển thị
+    __slots__ = ('name', 'x', 'y')
+
     def __init__(self, name, x, y):
         self.name = name
         self.x = x
@@ -14,11 +20,8 @@ class City:
     
     @classmethod
     def get_cities(cls, file_path):
-        cities = []
-        with open(file_path) as f:
-            for city in csv.reader(f):
-                cities.append(City(city[0], float(city[1]), float(city[2])))
-        return cities
+        # Đọc file CSV hoặc TSPLIB qua bộ nạp dạng mảng (có bộ nhớ đệm .npy)
+        return load_instance(file_path).cities
     
     @classmethod
     def calc_distance(cls, cities):
@@ -27,10 +30,76 @@ class City:
         total_distance += np.linalg.norm(coords[-1] - coords[0])
         return total_distance
 
+    @classmethod
+    def calc_distance_matrix(cls, cities):
+        return euclidean_matrix(np.array([(city.x, city.y) for city in cities], dtype=float).reshape(-1, 2))
+
+
+def tour_dtype(n):
+    # Kiểu chỉ số nhỏ nhất chứa được n thành phố: uint16 (2 byte/thành phố) cho đến 65536 thành phố
+    return np.uint16 if n <= np.iinfo(np.uint16).max + 1 else np.int32
+
+
+def canonical_tours(population):
+    # Đưa mỗi tour về dạng chuẩn: bắt đầu từ thành phố 0 và đi theo chiều có thành phố
+    # thứ hai nhỏ hơn thành phố cuối, để các tour chỉ khác điểm đầu/chiều đi trùng nhau
+    population = np.atleast_2d(population)
+    n = population.shape[1]
+    start = np.argmax(population == 0, axis=1)
+    columns = (start[:, np.newaxis] + np.arange(n)) % n
+    rotated = np.take_along_axis(population, columns, axis=1)
+    if n > 2:
+        flip = rotated[:, 1] > rotated[:, -1]
+        rotated[flip, 1:] = rotated[flip, :0:-1]
+    return rotated
+
+
+class TourCache:
+    # Bộ nhớ đệm fitness theo tour chuẩn hóa (bỏ qua điểm bắt đầu và chiều đi),
+    # giới hạn kích thước và loại bỏ mục ít dùng gần đây nhất (LRU)
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def keys(population):
+        return [row.tobytes() for row in canonical_tours(population)]
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate}
+
 
 class GA:
     def __init__(self, population_size=1000, iterations_limit=200, mutation_rate=0.1, crossover_rate=0.9, 
-                 crossover_type='OX', mutation_type='swap', target=np.inf, tournament_selection_size=4):
+                 crossover_type='OX', mutation_type='swap', target=np.inf, tournament_selection_size=4,
+                 seed=None, selection_type='tournament', local_search=None, local_search_target='elite',
+                 local_search_count=1, neighbor_list_size=8, profile=False, observers=None, cache_size=0,
+                 matrix_limit=5000, init_type='random', init_rate=0.1):
         self.population_size = population_size
         self.iterations_limit = iterations_limit
         self.mutation_rate = mutation_rate
@@ -39,24 +108,119 @@ class GA:
         self.mutation_type = mutation_type
         self.target = target
         self.tournament_selection_size = tournament_selection_size
+        self.selection_type = selection_type
+        # Chế độ memetic: local_search là '2opt', 'oropt' hoặc 'both', áp dụng cho
+        # local_search_count cá thể tốt nhất ('elite') hoặc con lai ngẫu nhiên ('offspring')
+        self.local_search = local_search
+        self.local_search_target = local_search_target
+        self.local_search_count = local_search_count
+        self.neighbor_list_size = neighbor_list_size
+        self.rng = np.random.default_rng(seed)
         self.gen_number = 0
-        self.population = []
+        # Quần thể là một mảng 2 chiều liên tục (population_size × n_cities) kiểu tour_dtype,
+        # fitness là vector tương ứng
+        self.population = np.empty((0, 0), dtype=np.uint16)
+        self.fitness = np.empty(0)
         self.fittest = 0
+        # Cá thể tốt nhất từ trước đến nay (quần thể không giữ lại cá thể ưu tú)
+        self.best_fitness = -np.inf
+        self.best_state = None
+        self.last_improvement = 0
+        # Bài toán lớn hơn matrix_limit thành phố không lưu bảng khoảng cách N×N
+        self.matrix_limit = matrix_limit
+        self.instance = None
+        self.distance_matrix = None
+        self.neighbors = None
+        # Đo đạc: thời gian từng giai đoạn (khi profile=True), số lần đánh giá,
+        # và các observer nhận một bản ghi sau mỗi thế hệ
+        self.profile = profile
+        self.observers = list(observers) if observers else []
+        self.stage_times = {}
+        self.evaluations = 0
+        self.delta_evaluations = 0
+        # Bộ nhớ đệm fitness cho các tour trùng lặp, tắt khi cache_size = 0
+        self.cache = TourCache(cache_size) if cache_size else None
+        # Khởi tạo: init_rate phần quần thể được tạo bằng heuristic init_type
+        # ('nearest_neighbor', 'greedy', 'space_filling_curve'), phần còn lại là hoán vị ngẫu nhiên
+        self.init_type = init_type
+        self.init_rate = init_rate
+
+    def load_cities(self, cities):
+        # Bảng khoảng cách N×N được tính một lần, các cá thể chỉ lưu chỉ số thành phố.
+        # cities là danh sách City hoặc một TSPInstance
+        self.instance = cities if isinstance(cities, TSPInstance) else TSPInstance.from_cities(cities)
+        self.distance_matrix = self.instance.distance_matrix(self.matrix_limit)
+        if self.local_search is not None:
+            self.neighbors = nearest_neighbors(self.distance_matrix, self.neighbor_list_size).tolist()
+
+    @property
+    def cities(self):
+        # Danh sách City chỉ được tạo khi cần (giao diện, kết quả)
+        return self.instance.cities if self.instance is not None else []
+
+    def decode(self, state):
+        return [self.cities[i] for i in state]
+
+    def calc_tour_distance(self, state):
+        tour = np.asarray(state)
+        return self.distance_matrix[tour, np.roll(tour, -1)].sum()
 
     def calc_fitness(self, state):
         # return ( 1 / (City.calc_distance(state) + 1 )) * pow(10, 6)
-        return (- City.calc_distance(state))
+        return self.calc_population_fitness(np.asarray(state)[np.newaxis])[0]
     
-    def calc_avr_fitness(self, population):
-        return np.mean([indiv[0] for indiv in population])
+    def calc_population_fitness(self, population):
+        if self.cache is None:
+            self.evaluations += len(population)
+            return - self.distance_matrix[population, np.roll(population, -1, axis=1)].sum(axis=1)
+
+        # Tra bộ nhớ đệm trước, chỉ đánh giá (một lần gọi vector) các tour chưa có.
+        # Khóa luôn được tạo từ kiểu chỉ số của quần thể để tour từ danh sách Python
+        # (int64) trùng khóa với cùng tour trong quần thể
+        population = np.asarray(population, dtype=tour_dtype(len(self.instance)))
+        keys = self.cache.keys(population)
+        fitness = np.array([self.cache.get(key) for key in keys], dtype=float)
+        missing = np.flatnonzero(np.isnan(fitness))
+        if len(missing):
+            tours = population[missing]
+            fitness[missing] = - self.distance_matrix[tours, np.roll(tours, -1, axis=1)].sum(axis=1)
+            self.evaluations += len(missing)
+            for i in missing:
+                self.cache.put(keys[i], fitness[i])
+        return fitness
+
+    def calc_avr_fitness(self, fitness):
+        return np.mean(fitness)
 
     def select_population(self, state):
-        self.population = []
-        for _ in range(self.population_size):
-            s = state.copy()
-            random.shuffle(s)
-            self.population.append([self.calc_fitness(s), s])
-        self.fittest = max(self.population, key=lambda p: p[0])[0]
+        self.load_cities(state)
+        n = len(self.instance)
+        self.population = np.empty((self.population_size, n), dtype=tour_dtype(n))
+        # Các hàng đầu là tour heuristic (tour tất định và các biến thể ngẫu nhiên của nó)
+        heuristic = 0
+        if self.init_type != 'random':
+            heuristic = min(self.population_size, max(1, round(self.init_rate * self.population_size)))
+            self.population[:heuristic] = initial_tours(self.instance, self.init_type, heuristic, self.rng,
+                                                        self.distance_matrix)
+        # Hoán vị ngẫu nhiên theo từng khối hàng để mảng số ngẫu nhiên tạm thời không chiếm
+        # population_size × n số thực (dãy số ngẫu nhiên giống hệt khi sinh một lần)
+        chunk = max(1, (1 << 20) // max(n, 1))
+        for start in range(heuristic, self.population_size, chunk):
+            rows = min(chunk, self.population_size - start)
+            self.population[start:start + rows] = np.argsort(self.rng.random((rows, n)), axis=1)
+        self.fitness = self.calc_population_fitness(self.population)
+        self.gen_number = 0
+        self.best_fitness = -np.inf
+        self.update_best()
+
+    def update_best(self):
+        best = np.argmax(self.fitness)
+        self.fittest = self.fitness[best]
+        if self.fittest > self.best_fitness:
+            self.best_fitness = self.fittest
+            self.best_state = self.population[best].copy()
+            self.last_improvement = self.gen_number
+        return best
 
     def crossover(self, parent1, parent2):
         if self.crossover_type == 'PMX':
@@ -66,99 +230,123 @@ class GA:
         elif self.crossover_type == 'OX':
             return self.crossover_OX(parent1, parent2)
         
+    def crossover_batch(self, parents1, parents2):
+        if self.crossover_type == 'PMX':
+            return self.crossover_PMX_batch(parents1, parents2)
+        elif self.crossover_type == 'CX':
+            return self.crossover_CX_batch(parents1, parents2)
+        elif self.crossover_type == 'OX':
+            return self.crossover_OX_batch(parents1, parents2)
+
+    # Các toán tử lai ghép nhận cặp cha mẹ là mảng chỉ số và chạy trong O(n) mỗi con.
+    # Dạng *_batch lai ghép nhiều cặp cùng lúc (mỗi hàng của parents1/parents2 là một cặp).
     def crossover_PMX(self, parent1, parent2):
+        children1, children2 = self.crossover_PMX_batch(np.asarray(parent1)[np.newaxis], np.asarray(parent2)[np.newaxis])
+        return children1[0], children2[0]
+
+    def crossover_PMX_batch(self, parents1, parents2):
         # PMX - 2 điểm cắt
 
         # Chọn hai điểm cắt ngẫu nhiên đảm bảo điểm 1 nhỏ hơn điểm 2
-        point1 = random.randint(0, len(parent1) - 1)
-        point2 = random.randint(point1 + 1, len(parent1))
-       
-        # Tạo từ điển để tra cứu nhanh hơn
-        parent1_map = {city: i for i, city in enumerate(parent1)}
-        parent2_map = {city: i for i, city in enumerate(parent2)}
-
-        # Tạo hai tập con
-        child1 = [-1] * len(parent1)
-        child2 = [-1] * len(parent2)
-
-        # Sao chép đoạn giữa từ điểm 1 đến điểm 2 của tập tập cha mẹ
-        for i in range(point1, point2):
-            child1[i] = parent1[i]
-            child2[i] = parent2[i]
+        n = parents1.shape[1]
+        points1 = self.rng.integers(0, n, size=len(parents1))
+        points2 = self.rng.integers(points1 + 1, n + 1)
+
+        children1 = np.empty_like(parents1)
+        children2 = np.empty_like(parents2)
+        for r in range(len(parents1)):
+            children1[r] = self._pmx_child(parents1[r], parents2[r], points1[r], points2[r])
+            children2[r] = self._pmx_child(parents2[r], parents1[r], points1[r], points2[r])
+        return children1, children2
 
-        # Tạo hai set để tra cứu tránh việc trùng lặp
-        mapped1 = set(child1[point1:point2])
-        mapped2 = set(child2[point1:point2])
+    @staticmethod
+    def _pmx_child(parent1, parent2, point1, point2):
+        n = len(parent1)
+        # Chỉ số kiểu intp để phép đánh chỉ số không phải chuyển kiểu từ tour_dtype mỗi lần
+        parent1, parent2 = parent1.astype(np.intp), parent2.astype(np.intp)
+        # Mảng vị trí thay cho từ điển, mặt nạ boolean thay cho kiểm tra "in"
+        parent1_pos = np.empty(n, dtype=np.intp)
+        parent1_pos[parent1] = np.arange(n)
+        child = np.full(n, -1, dtype=np.intp)
+        used = np.zeros(n, dtype=bool)
 
-        # Điền các phần tử còn lại bằng thuật toán
+        # Sao chép đoạn giữa từ điểm 1 đến điểm 2 của cha mẹ
+        child[point1:point2] = parent1[point1:point2]
+        used[parent1[point1:point2]] = True
+
+        # Điền các phần tử còn lại của đoạn giữa bằng ánh xạ
         for i in range(point1, point2):
-            if parent2[i] not in child1 and parent2[i] not in mapped1: # Kiểm tra tồn tại
+            city = parent2[i]
+            if not used[city]:
                 j = i
-                while child1[j] != -1 and parent2[j] in parent1_map:
-                    j = parent1_map[parent2[j]]
-                child1[j] = parent2[i] # Thêm phần tử vào tập con
-                mapped1.add(parent2[i]) # Thêm phần tử vào tập kiểm tra
+                while child[j] != -1:
+                    j = parent1_pos[parent2[j]]
+                child[j] = city
+                used[city] = True
 
-            if parent1[i] not in child2 and parent1[i] not in mapped2: # Tương tự như trên
-                j = i
-                while child2[j] != -1 and parent1[j] in parent2_map:
-                    j = parent2_map[parent1[j]]
-                child2[j] = parent1[i]
-                mapped2.add(parent1[i])
-
-        # Điền phần tử nếu bị bỏ sót, sử dụng mapping
-        for i in range(len(parent1)):
-            if child1[i] == -1: # Kiểm tra còn phần tử nào chưa được điền
-                city = next(c for c in parent2 if c not in child1) # Tìm phần tử đầu tiên trong parent thích hợp để điền vào tập con
-                child1[i] = city
-            if child2[i] == -1: # Tương tự
-                city = next(c for c in parent1 if c not in child2)
-                child2[i] = city
-
-        return child1, child2
-    
-    def crossover_CX (self, parent1, parent2):
+        # Các vị trí còn trống nhận lần lượt các thành phố chưa dùng theo thứ tự của parent2
+        child[child == -1] = parent2[~used[parent2]]
+        return child
+
+    def crossover_CX(self, parent1, parent2):
         # Cycle
-        # Khởi tạo child1 và child2 là các list rỗng
-        child1 = [-1] * len(parent1)
-        child2 = [-1] * len(parent2)
+        parent1, parent2 = np.asarray(parent1), np.asarray(parent2)
+        return self._cx_child(parent1, parent2), self._cx_child(parent2, parent1)
 
+    @staticmethod
+    def _cx_child(parent1, parent2):
+        parent2_pos = np.empty(len(parent2), dtype=np.intp)
+        parent2_pos[parent2] = np.arange(len(parent2))
+        child = np.array(parent2)
         index = 0
         while True:
-            child1[index] = parent1[index]
-            index = parent2.index(parent1[index])
-            if child1[index] != -1: break
+            child[index] = parent1[index]
+            index = parent2_pos[parent1[index]]
+            if index == 0: break
+        return child
 
-        for i in range(len(parent1)):
-            if child1[i] == -1:
-                child1[i] = parent2[i]
-
-        index = 0
-        while True:
-            child2[index] = parent2[index]
-            index = parent1.index(parent2[index])
-            if child2[index] != -1: break
+    def crossover_CX_batch(self, parents1, parents2):
+        # Cycle
+        return self._cx_children(parents1, parents2), self._cx_children(parents2, parents1)
 
-        for i in range(len(parent2)):
-            if child2[i] == -1:
-                child2[i] = parent1[i]
+    @staticmethod
+    def _cx_children(heads, tails):
+        # Đi theo chu trình chứa vị trí 0 trên tất cả các hàng cùng lúc
+        rows = np.arange(len(heads))
+        tails_pos = np.empty(tails.shape, dtype=np.intp)
+        tails_pos[rows[:, np.newaxis], tails] = np.arange(tails.shape[1])
+        heads_index = heads.astype(np.intp)
+        in_cycle = np.zeros(heads.shape, dtype=bool)
+        index = np.zeros(len(heads), dtype=np.intp)
+        active = rows
+        while len(active):
+            in_cycle[active, index[active]] = True
+            index[active] = tails_pos[active, heads_index[active, index[active]]]
+            active = active[index[active] != 0]
+        return np.where(in_cycle, heads, tails)
 
-        return child1, child2
-    
     def crossover_OX(self, parent1, parent2):
-        point = random.randint(0, len(parent1) - 1)
+        children1, children2 = self.crossover_OX_batch(np.asarray(parent1)[np.newaxis], np.asarray(parent2)[np.newaxis])
+        return children1[0], children2[0]
 
-        child1 = parent1[0:point]
-        for j in parent2:
-            if (j in child1) == False:
-                child1.append(j)
+    def crossover_OX_batch(self, parents1, parents2):
+        points = self.rng.integers(0, parents1.shape[1], size=len(parents1))
+        return self._ox_children(parents1, parents2, points), self._ox_children(parents2, parents1, points)
 
-        child2 = parent2[0:point]
-        for j in parent1:
-            if (j in child2) == False:
-                child2.append(j)
-
-        return child1, child2
+    @staticmethod
+    def _ox_children(heads, tails, points):
+        # Giữ đoạn đầu [0, point) của heads, phần còn lại là các thành phố của tails
+        # chưa xuất hiện, giữ nguyên thứ tự
+        rows = np.arange(len(heads))[:, np.newaxis]
+        in_head = np.arange(heads.shape[1]) < points[:, np.newaxis]
+        used = np.zeros(heads.shape, dtype=bool)
+        used[rows, heads] = in_head
+        keep = ~used[rows, tails]
+        dest = points[:, np.newaxis] + np.cumsum(keep, axis=1) - 1
+        children = np.array(heads)
+        r, c = np.nonzero(keep)
+        children[r, dest[r, c]] = tails[r, c]
+        return children
 
     def mutation(self, state):
         if self.mutation_type == 'swap':
@@ -170,59 +358,273 @@ class GA:
         elif self.mutation_type == 'insertion':
             return self.insertion_mutation(state)
         
+    # Các toán tử đột biến sửa cá thể tại chỗ và trả về (state, delta) với delta là độ thay đổi
+    # quãng đường, tính từ vài cạnh bị thay đổi thay vì đánh giá lại cả tour
+    def _two_points(self, n):
+        point1 = self.rng.integers(n)
+        point2 = self.rng.integers(n - 1)
+        if point2 >= point1:
+            point2 += 1
+        return point1, point2
+
+    def _edges_distance(self, state, positions):
+        # Tổng độ dài các cạnh (state[p], state[p + 1]) với p thuộc positions
+        n = len(state)
+        return sum(self.distance_matrix[state[p % n], state[(p + 1) % n]] for p in {p % n for p in positions})
+
     def swap_mutation(self, state):
-        point1, point2 = random.sample(range(len(state)), 2)
+        point1, point2 = self._two_points(len(state))
+        edges = (point1 - 1, point1, point2 - 1, point2)
+        before = self._edges_distance(state, edges)
         state[point1], state[point2] = state[point2], state[point1]
-        return state
-    
+        return state, self._edges_distance(state, edges) - before
+
     def inversion_mutation(self, state):
-        point1, point2 = sorted(random.sample(range(len(state)), 2))
-        state[point1:point2] = reversed(state[point1:point2])
-        return state
-    
+        point1, point2 = sorted(self._two_points(len(state)))
+        # Khoảng cách đối xứng nên chỉ hai cạnh ở hai đầu đoạn bị đảo thay đổi
+        edges = (point1 - 1, point2 - 1)
+        before = self._edges_distance(state, edges)
+        state[point1:point2] = state[point1:point2][::-1]
+        return state, self._edges_distance(state, edges) - before
+
     def scramble_mutation(self, state):
-        point1, point2 = sorted(random.sample(range(len(state)), 2))
-        subset = state[point1:point2]
-        random.shuffle(subset)
-        state[point1:point2] = subset
-        return state
-    
+        point1, point2 = sorted(self._two_points(len(state)))
+        edges = range(point1 - 1, point2)
+        before = self._edges_distance(state, edges)
+        self.rng.shuffle(state[point1:point2])
+        return state, self._edges_distance(state, edges) - before
+
     def insertion_mutation(self, state):
-        point1, point2 = random.sample(range(len(state)), 2)
-        city = state.pop(point1)
-        state.insert(point2, city)
-        return state
-    
+        n = len(state)
+        point1, point2 = self._two_points(n)
+        d = self.distance_matrix
+        city = state[point1]
+        prev, following = state[point1 - 1], state[(point1 + 1) % n]
+        if point1 < point2:
+            state[point1:point2] = state[point1 + 1:point2 + 1]
+        else:
+            state[point2 + 1:point1 + 1] = state[point2:point1]
+        state[point2] = city
+        a, b = state[point2 - 1], state[(point2 + 1) % n]
+        delta = d[a, city] + d[city, b] - d[a, b] + d[prev, following] - d[prev, city] - d[city, following]
+        return state, delta
+
+    def mutation_stage(self, population, fitness):
+        # Chọn cá thể đột biến theo chỉ số, không tìm kiếm trong danh sách.
+        # population phải là bộ đệm riêng của thế hệ mới: các hàng sao chép từ thế hệ cũ
+        # đã được chép (fancy indexing) nên sửa tại chỗ không ảnh hưởng đến cá thể khác.
+        # fitness được cập nhật theo delta
+        indices = self.rng.integers(len(population), size=round(self.mutation_rate * len(population)))
+        for i in indices:
+            _, delta = self.mutation(population[i])
+            fitness[i] -= delta
+        self.delta_evaluations += len(indices)
+        return indices
+
+    def local_search_stage(self, population, fitness, offspring_count):
+        if self.local_search is None:
+            return
+        if self.local_search_target == 'elite':
+            chosen = np.argsort(fitness)[-self.local_search_count:]
+        elif self.local_search_target == 'offspring':
+            chosen = self.rng.choice(offspring_count, size=min(self.local_search_count, offspring_count), replace=False)
+        # Nước đi 2-opt/Or-opt được đánh giá bằng chênh lệch nên fitness chỉ cần cập nhật theo delta
+        for i in chosen:
+            fitness[i] -= improve_tour(population[i], self.distance_matrix, self.neighbors, self.local_search)
+        self.delta_evaluations += len(chosen)
+
+    # Các phép chọn lọc trả về chỉ số của tất cả cha mẹ trong một lần gọi
+    def select_parents(self, count):
+        if self.selection_type == 'tournament':
+            return self.tournament_selection_batch(count)
+        elif self.selection_type == 'roulette':
+            return self.roulette_selection_batch(count)
+        elif self.selection_type == 'rank':
+            return self.rank_selection_batch(count)
+
+    def tournament_selection_batch(self, count):
+        # Mỗi hàng là một giải đấu, lấy argmax theo hàng trên vector fitness
+        contenders = self.rng.integers(len(self.fitness), size=(count, self.tournament_selection_size))
+        return contenders[np.arange(count), np.argmax(self.fitness[contenders], axis=1)]
+
+    def roulette_selection_batch(self, count):
+        # fitness là quãng đường âm nên xác suất tỉ lệ với nghịch đảo quãng đường
+        weights = 1 / np.maximum(- self.fitness, np.finfo(float).tiny)
+        return self.rng.choice(len(self.fitness), size=count, p=weights / weights.sum())
+
+    def rank_selection_batch(self, count):
+        ranks = np.empty(len(self.fitness))
+        ranks[np.argsort(self.fitness)] = np.arange(1, len(self.fitness) + 1)
+        return self.rng.choice(len(self.fitness), size=count, p=ranks / ranks.sum())
+
     def tournament_selection(self):
-        tournament = random.sample(self.population, self.tournament_selection_size)
-        return max(tournament, key=lambda p: p[0])[1]
+        return self.population[self.tournament_selection_batch(1)[0]]
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def _tick(self, stage, start):
+        now = time.perf_counter()
+        self.stage_times[stage] = self.stage_times.get(stage, 0) + now - start
+        return now
+
+    def calc_diversity(self):
+        # Số tour khác nhau (không phân biệt điểm bắt đầu và chiều đi) và tỉ lệ cạnh trung bình
+        # mà mỗi cá thể có chung với cá thể tốt nhất
+        n = self.population.shape[1]
+        best = self.population[np.argmax(self.fitness)]
+        successor = np.empty(n, dtype=np.intp)
+        predecessor = np.empty(n, dtype=np.intp)
+        successor[best] = np.roll(best, -1)
+        predecessor[best] = np.roll(best, 1)
+        following = np.roll(self.population, -1, axis=1)
+        shared = (successor[self.population] == following) | (predecessor[self.population] == following)
+        unique_tours = len(np.unique(canonical_tours(self.population), axis=0))
+        return unique_tours, shared.mean()
+
+    def generation_record(self):
+        unique_tours, edge_overlap = self.calc_diversity()
+        record = {
+            'generation': self.gen_number,
+            'fittest': float(self.fittest),
+            'average': float(self.calc_avr_fitness(self.fitness)),
+            'evaluations': self.evaluations,
+            'delta_evaluations': self.delta_evaluations,
+            'unique_tours': unique_tours,
+            'edge_overlap': float(edge_overlap)
+        }
+        if self.cache is not None:
+            record['cache_hit_rate'] = self.cache.hit_rate
+        if self.profile:
+            for stage, seconds in self.stage_times.items():
+                record[f'time_{stage}'] = seconds
+        return record
 
     def evolve(self):
-        new_population = []
+        # Một thế hệ cho giao diện: trả về tour tốt nhất dưới dạng danh sách City
+        best = self.step()
+        return [self.fittest, self.decode(self.population[best])], self.calc_avr_fitness(self.fitness)
+
+    def step(self):
+        # Một thế hệ chỉ làm việc trên mảng chỉ số, trả về chỉ số cá thể tốt nhất.
+        # run() và mô hình đảo dùng hàm này để không tạo đối tượng City mỗi thế hệ
+        profile = self.profile
+        if profile:
+            self.stage_times = {}
+            start = generation_start = time.perf_counter()
+        new_population = np.empty_like(self.population)
+        new_fitness = np.empty(self.population_size)
         # Tính số lượng cặp lai ghép cụ thể
         num_crossovers = int((self.crossover_rate * self.population_size) // 2)
+        offspring_count = num_crossovers * 2
+
+        # Chọn lọc cha mẹ cho lai ghép và các cá thể được sao chép
+        parents = self.select_parents(offspring_count)
+        copies = self.select_parents(self.population_size - offspring_count)
+        if profile: start = self._tick('selection', start)
+
+        # Thực hiện lai ghép cho num_crossovers cặp cha mẹ trong một lần gọi
+        parents = self.population[parents]
+        children1, children2 = self.crossover_batch(parents[0::2], parents[1::2])
+        new_population[0:offspring_count:2] = children1
+        new_population[1:offspring_count:2] = children2
+        if profile: start = self._tick('crossover', start)
 
-        # Thực hiện lai ghép cho num_crossovers cặp cha mẹ
-        for _ in range(num_crossovers):
-            parent1 = self.tournament_selection()
-            parent2 = self.tournament_selection()
-            child1, child2 = self.crossover(parent1, parent2)
-            new_population.append(child1)
-            new_population.append(child2)
+        # Chỉ các con lai cần được đánh giá đầy đủ
+        new_fitness[:offspring_count] = self.calc_population_fitness(new_population[:offspring_count])
+        if profile: start = self._tick('evaluation', start)
 
-        # Số còn lại được sao chép trực tiếp từ quần thể hiện tại
-        for _ in range(self.population_size - (num_crossovers * 2)):
-            child = self.tournament_selection()
-            new_population.append(child)
+        # Số còn lại được sao chép trực tiếp từ quần thể hiện tại cùng với fitness đã biết
+        new_population[offspring_count:] = self.population[copies]
+        new_fitness[offspring_count:] = self.fitness[copies]
+        if profile: start = self._tick('reproduction', start)
 
         # Thực hiện đột biến
-        for _ in range(round(self.mutation_rate * self.population_size)):
-            random_state = random.choice(new_population)
-            new_population[new_population.index(random_state)] = self.mutation(random_state)
+        self.mutation_stage(new_population, new_fitness)
+        if profile: start = self._tick('mutation', start)
 
-        new_population = [[self.calc_fitness(state), state] for state in new_population]
         self.population = new_population
+        self.fitness = new_fitness
+        if self.local_search is not None:
+            self.local_search_stage(self.population, self.fitness, offspring_count)
+            if profile: start = self._tick('local_search', start)
+
         self.gen_number += 1
-        self.fittest = max(self.population, key=lambda p: p[0])[0]
+        best = self.update_best()
+        if profile: self.stage_times['total'] = time.perf_counter() - generation_start
+
+        if self.observers:
+            record = self.generation_record()
+            for observer in self.observers:
+                observer(record)
+        return best
+
+    def run(self, cities=None, target_distance=None, stall_generations=None, time_budget=None,
+            min_diversity=None, max_generations=None, checkpoint=None, checkpoint_interval=10, callback=None):
+        # Chạy GA không giao diện cho đến khi gặp một điều kiện dừng:
+        # - 'target': quãng đường tốt nhất <= target_distance (mặc định dùng self.target theo fitness)
+        # - 'stall': không cải thiện trong stall_generations thế hệ liên tiếp
+        # - 'time_budget': hết time_budget giây
+        # - 'diversity': tỉ lệ tour khác nhau trong quần thể < min_diversity
+        # - 'iterations_limit': đạt max_generations (mặc định self.iterations_limit) thế hệ
+        # - 'cancelled': callback(self), được gọi sau mỗi thế hệ, trả về True
+        # Với checkpoint (đường dẫn file), trạng thái được ghi nền mỗi checkpoint_interval thế hệ
+        # và khi dừng; chạy tiếp bằng tsp_checkpoint.load_checkpoint(checkpoint).run(...)
+        if cities is not None:
+            self.select_population(cities)
+        target = self.target if target_distance is None else - target_distance
+        if max_generations is None:
+            max_generations = self.iterations_limit
+
+        writer = None
+        if checkpoint is not None:
+            from tsp_checkpoint import CheckpointWriter
+            writer = CheckpointWriter(checkpoint, checkpoint_interval)
+
+        start_time = time.time()
+        stop_reason = 'iterations_limit'
+        while True:
+            if self.best_fitness >= target:
+                stop_reason = 'target'
+                break
+            if self.gen_number >= max_generations:
+                break
+            if stall_generations is not None and self.gen_number - self.last_improvement >= stall_generations:
+                stop_reason = 'stall'
+                break
+            if time_budget is not None and time.time() - start_time >= time_budget:
+                stop_reason = 'time_budget'
+                break
+            if min_diversity is not None and self.gen_number > 0:
+                unique_tours = len(np.unique(canonical_tours(self.population), axis=0))
+                if unique_tours / len(self.population) < min_diversity:
+                    stop_reason = 'diversity'
+                    break
+
+            try:
+                self.step()
+            except BaseException:
+                # Thế hệ dở dang không được ghi, chỉ chờ ghi xong checkpoint trước đó
+                if writer is not None:
+                    writer.close()
+                raise
+            if writer is not None:
+                writer.submit(self)
+            if callback is not None and callback(self):
+                stop_reason = 'cancelled'
+                break
+
+        if writer is not None:
+            writer.submit(self, force=True)
+            writer.close()
 
-        return sorted(self.population, key=lambda p: p[0])[-1], self.calc_avr_fitness(self.population)
\ No newline at end of file
+        return {
+            'tour': [str(name) for name in self.instance.names[self.best_state].tolist()],
+            'state': self.best_state.copy(),
+            'distance': float(- self.best_fitness),
+            'fitness': float(self.best_fitness),
+            'generations': self.gen_number,
+            'evaluations': self.evaluations,
+            'elapsed': time.time() - start_time,
+            'stop_reason': stop_reason
+        }
\ No newline at end of file
@@ -0,0 +1,192 @@
+import numpy as np
+from tsp_instance import GridIndex, EUCLIDEAN_TYPES
+from tsp_local_search import nearest_neighbors
+
+
+INIT_TYPES = ['random', 'nearest_neighbor', 'greedy', 'space_filling_curve']
+
+# Số láng giềng gần nhất làm cạnh ứng viên cho greedy
+GREEDY_NEIGHBORS = 10
+
+
+def _grid(instance):
+    if instance.coords is not None and instance.edge_weight_type in EUCLIDEAN_TYPES:
+        return GridIndex(instance.coords)
+    return None
+
+
+def _nearest_unvisited(grid, city, visited, max_radius):
+    # Tìm thành phố chưa thăm gần city nhất trên các vành ô quanh city. Các điểm trên vành
+    # radius cách city ít nhất (radius - 1) ô nên dừng khi đã có ứng viên gần hơn thế.
+    # Trả về -1 nếu trong max_radius vành chưa chắc chắn tìm được
+    ix, iy = grid.cell_xy[city]
+    point = grid.coords[city]
+    best, best_d = -1, np.inf
+    for radius in range(max_radius + 1):
+        if best >= 0 and best_d <= ((radius - 1) * grid.cell_size) ** 2:
+            return best
+        candidates = grid.ring(ix, iy, radius)
+        candidates = candidates[~visited[candidates]]
+        if len(candidates):
+            diff = grid.coords[candidates] - point
+            d = np.einsum('ij,ij->i', diff, diff)
+            j = np.argmin(d)
+            if d[j] < best_d:
+                best, best_d = candidates[j], d[j]
+        if grid.covers(ix, iy, radius):
+            return best
+    if best >= 0 and best_d <= (max_radius * grid.cell_size) ** 2:
+        return best
+    return -1
+
+
+def nearest_neighbor_tour(instance, start=0, grid=None, max_radius=4):
+    # Láng giềng gần nhất: từ start luôn đi đến thành phố chưa thăm gần nhất. Với grid chỉ
+    # xét vài vành ô quanh thành phố hiện tại, nếu không đủ thì tìm trên mọi thành phố chưa thăm
+    n = len(instance)
+    visited = np.zeros(n, dtype=bool)
+    tour = [start]
+    visited[start] = True
+    city = start
+    for _ in range(n - 1):
+        following = _nearest_unvisited(grid, city, visited, max_radius) if grid is not None else -1
+        if following < 0:
+            unvisited = np.flatnonzero(~visited)
+            following = unvisited[np.argmin(instance.distance(city, unvisited))]
+        visited[following] = True
+        tour.append(following)
+        city = following
+    return np.array(tour, dtype=np.intp)
+
+
+def _join_paths(instance, paths):
+    # Nối các đoạn đường thành một tour: từ cuối đoạn hiện tại đi đến đầu mút gần nhất
+    # của một đoạn chưa dùng (đảo chiều đoạn nếu cần)
+    ends = np.array([(path[0], path[-1]) for path in paths], dtype=np.intp)
+    used = np.zeros(len(paths), dtype=bool)
+    used[0] = True
+    tour = list(paths[0])
+    for _ in range(len(paths) - 1):
+        free = np.flatnonzero(~used)
+        candidates = ends[free].ravel()
+        j = int(np.argmin(instance.distance(tour[-1], candidates)))
+        path = paths[free[j // 2]]
+        tour.extend(path if j % 2 == 0 else path[::-1])
+        used[free[j // 2]] = True
+    return np.array(tour, dtype=np.intp)
+
+
+def greedy_tour(instance, neighbors, rng=None, noise=0.1):
+    # Greedy edge: duyệt các cạnh ứng viên (cạnh đến các láng giềng gần nhất) theo độ dài
+    # tăng dần, nhận cạnh nếu hai đầu có bậc < 2 và không tạo chu trình (union-find).
+    # Các đoạn còn lại được nối bằng _join_paths. Với rng, độ dài cạnh được nhân nhiễu
+    # ngẫu nhiên trong [1, 1 + noise) để tạo biến thể
+    n = len(instance)
+    neighbors = np.asarray(neighbors)
+    a = np.repeat(np.arange(n), neighbors.shape[1])
+    b = neighbors.ravel()
+    keys = np.unique(np.minimum(a, b) * n + np.maximum(a, b))
+    a, b = keys // n, keys % n
+    lengths = np.asarray(instance.distance(a, b), dtype=float)
+    if rng is not None:
+        lengths = lengths * (1 + noise * rng.random(len(lengths)))
+    order = np.argsort(lengths, kind='stable')
+
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    links = [[] for _ in range(n)]
+    edges = 0
+    for u, v in zip(a[order].tolist(), b[order].tolist()):
+        if len(links[u]) < 2 and len(links[v]) < 2:
+            root_u, root_v = find(u), find(v)
+            if root_u != root_v:
+                parent[root_u] = root_v
+                links[u].append(v)
+                links[v].append(u)
+                edges += 1
+                if edges == n - 1:
+                    break
+
+    # Tách các đoạn đường bắt đầu từ các đầu mút (bậc < 2)
+    paths = []
+    seen = [False] * n
+    for start in range(n):
+        if len(links[start]) < 2 and not seen[start]:
+            path, previous, city = [start], -1, start
+            seen[start] = True
+            while True:
+                following = [c for c in links[city] if c != previous]
+                if not following:
+                    break
+                previous, city = city, following[0]
+                path.append(city)
+                seen[city] = True
+            paths.append(path)
+    return _join_paths(instance, paths)
+
+
+def hilbert_index(coords, order=16):
+    # Vị trí của mỗi điểm trên đường cong Hilbert bậc order phủ hình bao của các điểm
+    side = 1 << order
+    low = coords.min(axis=0)
+    extent = np.maximum(coords.max(axis=0) - low, np.finfo(float).tiny)
+    xy = ((coords - low) / extent.max() * (side - 1)).astype(np.int64)
+    x, y = xy[:, 0], xy[:, 1]
+    d = np.zeros(len(coords), dtype=np.int64)
+    s = side // 2
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Xoay góc phần tư để đoạn cong con có cùng hướng
+        flip = ~ry & rx
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s //= 2
+    return d
+
+
+def space_filling_curve_tour(instance, rng=None):
+    # Thứ tự các thành phố trên đường cong Hilbert: O(n log n), các điểm gần nhau trên mặt
+    # phẳng phần lớn gần nhau trên tour. Với rng, tọa độ được xoay một góc ngẫu nhiên
+    if instance.coords is None:
+        raise ValueError("The space-filling-curve initializer needs city coordinates")
+    coords = np.asarray(instance.coords, dtype=float)
+    if rng is not None:
+        angle = rng.uniform(0, 2 * np.pi)
+        rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+        coords = coords @ rotation
+    return np.argsort(hilbert_index(coords), kind='stable')
+
+
+def initial_tours(instance, init_type, count, rng, distance_matrix=None):
+    # count tour khởi tạo theo heuristic init_type: tour đầu tiên là bản tất định, các tour
+    # sau là biến thể ngẫu nhiên (điểm xuất phát, nhiễu độ dài cạnh hoặc góc xoay)
+    if init_type not in INIT_TYPES:
+        raise ValueError(f"Unknown init type: {init_type}")
+    n = len(instance)
+    if init_type == 'random':
+        return np.argsort(rng.random((count, n)), axis=1)
+
+    tours = np.empty((count, n), dtype=np.intp)
+    if init_type == 'nearest_neighbor':
+        grid = _grid(instance)
+        for i in range(count):
+            tours[i] = nearest_neighbor_tour(instance, 0 if i == 0 else int(rng.integers(n)), grid)
+    elif init_type == 'greedy':
+        if distance_matrix is None:
+            distance_matrix = instance.distance_matrix()
+        neighbors = nearest_neighbors(distance_matrix, GREEDY_NEIGHBORS)
+        for i in range(count):
+            tours[i] = greedy_tour(instance, neighbors, None if i == 0 else rng)
+    elif init_type == 'space_filling_curve':
+        for i in range(count):
+            tours[i] = space_filling_curve_tour(instance, None if i == 0 else rng)
+    return tours
@@ -0,0 +1,364 @@
+import os
+import csv
+import json
+import numpy as np
+
+
+EDGE_WEIGHT_TYPES = ['EUC', 'EUC_2D', 'CEIL_2D', 'ATT', 'GEO', 'EXPLICIT']
+# Các kiểu khoảng cách tăng theo khoảng cách Euclid của tọa độ (dùng được chỉ mục lưới)
+EUCLIDEAN_TYPES = ['EUC', 'EUC_2D', 'CEIL_2D', 'ATT']
+CACHE_DIR = '.tsp_cache'
+CACHE_VERSION = 1
+
+
+class TSPInstance:
+    # Bài toán được lưu dạng mảng NumPy (có thể ánh xạ bộ nhớ từ file .npy), đối tượng City
+    # chỉ được tạo khi cần (ví dụ để giao diện hiển thị tên thành phố)
+    def __init__(self, coords=None, names=None, edge_weight_type='EUC', weights=None, name=None):
+        if edge_weight_type not in EDGE_WEIGHT_TYPES:
+            raise ValueError(f"Unsupported edge weight type: {edge_weight_type}")
+        if coords is None and weights is None:
+            raise ValueError("An instance needs coordinates or explicit edge weights")
+        self.coords = coords
+        self.weights = weights
+        self.edge_weight_type = edge_weight_type
+        self.name = name
+        self._names = names
+        self._cities = None
+        self._geo = None
+
+    def __len__(self):
+        return len(self.coords) if self.coords is not None else len(self.weights)
+
+    @classmethod
+    def from_cities(cls, cities):
+        coords = np.array([(city.x, city.y) for city in cities], dtype=float).reshape(-1, 2)
+        instance = cls(coords, np.array([str(city.name) for city in cities]))
+        instance._cities = list(cities)
+        return instance
+
+    @property
+    def names(self):
+        if self._names is None:
+            return np.arange(1, len(self) + 1).astype(str)
+        return self._names
+
+    @property
+    def cities(self):
+        if self._cities is None:
+            from tsp_ga import City
+            if self.coords is None:
+                xs = ys = np.full(len(self), np.nan)
+            else:
+                xs, ys = self.coords[:, 0].tolist(), self.coords[:, 1].tolist()
+            self._cities = [City(str(name), x, y) for name, x, y in zip(self.names.tolist(), xs, ys)]
+        return self._cities
+
+    def distance(self, a, b):
+        # Khoảng cách giữa các thành phố a và b (số nguyên hoặc mảng chỉ số cùng kích thước)
+        if self.edge_weight_type == 'EXPLICIT':
+            return self.weights[a, b]
+        if self.edge_weight_type == 'GEO':
+            return self._geo_distance(a, b)
+        dx = self.coords[a, 0] - self.coords[b, 0]
+        dy = self.coords[a, 1] - self.coords[b, 1]
+        if self.edge_weight_type == 'ATT':
+            r = np.sqrt((dx * dx + dy * dy) / 10.0)
+            t = np.floor(r + 0.5)
+            return np.where(t < r, t + 1, t)
+        d = np.sqrt(dx * dx + dy * dy)
+        if self.edge_weight_type == 'EUC_2D':
+            return np.floor(d + 0.5)
+        elif self.edge_weight_type == 'CEIL_2D':
+            return np.ceil(d)
+        return d
+
+    def _geo_distance(self, a, b):
+        # Công thức GEO của TSPLIB: tọa độ dạng DDD.MM, bán kính Trái Đất 6378.388 km
+        if self._geo is None:
+            degrees = np.trunc(self.coords)
+            self._geo = 3.141592 * (degrees + 5.0 * (self.coords - degrees) / 3.0) / 180.0
+        latitude, longitude = self._geo[:, 0], self._geo[:, 1]
+        q1 = np.cos(longitude[a] - longitude[b])
+        q2 = np.cos(latitude[a] - latitude[b])
+        q3 = np.cos(latitude[a] + latitude[b])
+        d = np.trunc(6378.388 * np.arccos(np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1, 1)) + 1.0)
+        return np.where(np.asarray(a) == np.asarray(b), 0.0, d)
+
+    def distance_matrix(self, max_size=5000):
+        # Bảng N×N đầy đủ cho bài toán nhỏ; bài toán lớn hơn max_size dùng bảng "ảo"
+        # tính khoảng cách từ tọa độ khi được truy cập
+        n = len(self)
+        if self.weights is not None:
+            return self.weights
+        if n > max_size:
+            return LazyDistanceMatrix(self)
+        if self.edge_weight_type in ('EUC', 'EUC_2D', 'CEIL_2D'):
+            d = euclidean_matrix(self.coords)
+            if self.edge_weight_type == 'EUC_2D':
+                np.floor(np.add(d, 0.5, out=d), out=d)
+            elif self.edge_weight_type == 'CEIL_2D':
+                np.ceil(d, out=d)
+            return d
+        index = np.arange(n)
+        return self.distance(index[:, np.newaxis], index[np.newaxis, :])
+
+
+def euclidean_matrix(coords):
+    # Bảng khoảng cách Euclid N×N tính tại chỗ: bộ nhớ tạm tối đa hai mảng N×N thay vì
+    # mảng hiệu N×N×2 cộng bảng kết quả
+    x, y = coords[:, 0], coords[:, 1]
+    d = np.subtract.outer(x, x)
+    np.multiply(d, d, out=d)
+    dy = np.subtract.outer(y, y)
+    np.multiply(dy, dy, out=dy)
+    d += dy
+    del dy
+    return np.sqrt(d, out=d)
+
+
+class GridIndex:
+    # Chỉ mục không gian dạng lưới đều, trung bình points_per_cell điểm mỗi ô. Các điểm được
+    # sắp theo số thứ tự ô (ix * ny + iy) nên các ô liền nhau trên một hàng nằm liền nhau
+    # trong order. Xây dựng O(n log n)
+    def __init__(self, coords, points_per_cell=2):
+        coords = np.asarray(coords, dtype=float)
+        n = len(coords)
+        low = coords.min(axis=0)
+        extent = coords.max(axis=0) - low
+        # Ô vuông theo diện tích, hoặc theo chiều dài khi các điểm gần như thẳng hàng
+        cell_size = max(np.sqrt(extent[0] * extent[1] * points_per_cell / n), extent.max() * points_per_cell / n)
+        self.coords = coords
+        self.cell_size = cell_size if cell_size > 0 else 1.0
+        self.cell_xy = ((coords - low) // self.cell_size).astype(np.intp)
+        self.shape = tuple(int(size) for size in self.cell_xy.max(axis=0) + 1)
+        cells = self.cell_xy[:, 0] * self.shape[1] + self.cell_xy[:, 1]
+        self.order = np.argsort(cells, kind='stable')
+        self.starts = np.zeros(self.shape[0] * self.shape[1] + 1, dtype=np.intp)
+        np.cumsum(np.bincount(cells, minlength=self.shape[0] * self.shape[1]), out=self.starts[1:])
+
+    def _row(self, x, y0, y1):
+        ny = self.shape[1]
+        return self.order[self.starts[x * ny + y0]:self.starts[x * ny + y1 + 1]]
+
+    def block(self, ix, iy, radius):
+        # Các điểm trong khối ô vuông bán kính radius ô quanh ô (ix, iy)
+        nx, ny = self.shape
+        y0, y1 = max(iy - radius, 0), min(iy + radius, ny - 1)
+        rows = range(max(ix - radius, 0), min(ix + radius, nx - 1) + 1)
+        return np.concatenate([self._row(x, y0, y1) for x in rows])
+
+    def ring(self, ix, iy, radius):
+        # Các điểm trong các ô cách ô (ix, iy) đúng radius ô (theo khoảng cách Chebyshev)
+        if radius == 0:
+            return self._row(ix, iy, iy)
+        nx, ny = self.shape
+        y0, y1 = max(iy - radius, 0), min(iy + radius, ny - 1)
+        parts = [self._row(x, y0, y1) for x in (ix - radius, ix + radius) if 0 <= x < nx]
+        for x in range(max(ix - radius + 1, 0), min(ix + radius - 1, nx - 1) + 1):
+            parts.extend(self._row(x, y, y) for y in (iy - radius, iy + radius) if 0 <= y < ny)
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+
+    def covers(self, ix, iy, radius):
+        nx, ny = self.shape
+        return ix - radius <= 0 and iy - radius <= 0 and ix + radius >= nx - 1 and iy + radius >= ny - 1
+
+    def nearest_neighbors(self, k):
+        # k láng giềng gần nhất (Euclid) của mọi điểm: với mỗi ô, mở rộng khối ô đến khi
+        # láng giềng thứ k của mọi điểm trong ô gần hơn mọi điểm nằm ngoài khối
+        n = len(self.coords)
+        k = min(k, n - 1)
+        neighbors = np.empty((n, k), dtype=np.intp)
+        if k <= 0:
+            return neighbors
+        ny = self.shape[1]
+        for cell in np.flatnonzero(np.diff(self.starts)):
+            members = self.order[self.starts[cell]:self.starts[cell + 1]]
+            ix, iy = divmod(int(cell), ny)
+            radius = 1
+            while True:
+                candidates = self.block(ix, iy, radius)
+                covered = self.covers(ix, iy, radius)
+                if len(candidates) > k or covered:
+                    diff = self.coords[members][:, np.newaxis, :] - self.coords[candidates][np.newaxis, :, :]
+                    d = np.einsum('ijk,ijk->ij', diff, diff)
+                    d[members[:, np.newaxis] == candidates[np.newaxis, :]] = np.inf
+                    nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+                    nearest_d = np.take_along_axis(d, nearest, axis=1)
+                    if covered or nearest_d.max() <= (radius * self.cell_size) ** 2:
+                        break
+                radius += 1
+            order = np.argsort(nearest_d, axis=1, kind='stable')
+            neighbors[members] = np.take_along_axis(candidates[nearest], order, axis=1)
+        return neighbors
+
+
+class LazyDistanceMatrix:
+    # Hỗ trợ cùng cú pháp d[a, b] như mảng N×N nhưng không lưu bảng
+    def __init__(self, instance):
+        self.instance = instance
+        self.shape = (len(instance), len(instance))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        a, b = index
+        return self.instance.distance(a, b)
+
+    def nearest_neighbors(self, k, chunk_size=None):
+        # Với khoảng cách Euclid dùng chỉ mục lưới; các kiểu khác tính vét cạn theo từng
+        # khối hàng để giới hạn bộ nhớ (mặc định mỗi khối khoảng 2^20 khoảng cách)
+        n = len(self)
+        k = min(k, n - 1)
+        if self.instance.coords is not None and self.instance.edge_weight_type in EUCLIDEAN_TYPES:
+            # Khoảng k điểm mỗi ô: ít ô hơn nên ít vòng lặp Python hơn
+            return GridIndex(self.instance.coords, points_per_cell=max(2, k)).nearest_neighbors(k)
+        if chunk_size is None:
+            chunk_size = max(1, (1 << 20) // n)
+        index = np.arange(n)
+        neighbors = np.empty((n, k), dtype=np.intp)
+        for start in range(0, n, chunk_size):
+            rows = index[start:start + chunk_size]
+            d = np.asarray(self.instance.distance(rows[:, np.newaxis], index[np.newaxis, :]), dtype=float)
+            d[np.arange(len(rows)), rows] = np.inf
+            candidates = np.argpartition(d, k - 1, axis=1)[:, :k] if k < n - 1 else np.argsort(d, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(d, candidates, axis=1), axis=1)
+            neighbors[start:start + len(rows)] = np.take_along_axis(candidates, order, axis=1)
+        return neighbors
+
+
+def load_csv(file_path):
+    # Đọc file "tên,x,y" thành mảng thay vì tạo đối tượng City cho từng dòng. Dùng csv.reader
+    # để tên có dấu phẩy trong ngoặc kép hoặc bắt đầu bằng '#' được đọc đúng
+    with open(file_path, newline='') as f:
+        rows = [row for row in csv.reader(f) if row]
+    columns = min((len(row) for row in rows), default=0)
+    if columns < 3:
+        raise ValueError(f"{file_path} must have name,x,y columns, found {columns}")
+    names = np.array([row[0].strip() for row in rows])
+    coords = np.array([row[1:3] for row in rows], dtype=float)
+    return TSPInstance(coords, names, 'EUC', name=os.path.basename(file_path))
+
+
+def _expand_weights(values, n, edge_weight_format):
+    # Chuyển EDGE_WEIGHT_SECTION (các định dạng tam giác/đầy đủ) thành ma trận đối xứng N×N
+    if edge_weight_format == 'FULL_MATRIX':
+        return values[:n * n].reshape(n, n)
+    triangles = {
+        'UPPER_ROW': (np.triu_indices, 1), 'LOWER_COL': (np.triu_indices, 1),
+        'LOWER_ROW': (np.tril_indices, -1), 'UPPER_COL': (np.tril_indices, -1),
+        'UPPER_DIAG_ROW': (np.triu_indices, 0), 'LOWER_DIAG_COL': (np.triu_indices, 0),
+        'LOWER_DIAG_ROW': (np.tril_indices, 0), 'UPPER_DIAG_COL': (np.tril_indices, 0),
+    }
+    if edge_weight_format not in triangles:
+        raise ValueError(f"Unsupported edge weight format: {edge_weight_format}")
+    indices, offset = triangles[edge_weight_format]
+    rows, cols = indices(n, offset)
+    weights = np.zeros((n, n))
+    weights[rows, cols] = values[:len(rows)]
+    weights[cols, rows] = values[:len(rows)]
+    return weights
+
+
+def load_tsplib(file_path):
+    # Đọc file .tsp của TSPLIB (NODE_COORD_SECTION, EDGE_WEIGHT_SECTION, DISPLAY_DATA_SECTION)
+    header = {}
+    sections = {}
+    current = None
+    with open(file_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line == 'EOF':
+                continue
+            keyword = line.split(':')[0].strip().upper()
+            if keyword.endswith('_SECTION'):
+                current = sections.setdefault(keyword, [])
+            elif ':' in line and not line[0].isdigit() and line[0] not in '+-.':
+                header[keyword] = line.split(':', 1)[1].strip()
+                current = None
+            elif current is not None:
+                current.append(line)
+
+    n = int(header['DIMENSION'])
+    edge_weight_type = header.get('EDGE_WEIGHT_TYPE', 'EUC_2D').upper()
+    if edge_weight_type not in EDGE_WEIGHT_TYPES:
+        raise ValueError(f"Unsupported edge weight type: {edge_weight_type}")
+
+    coords, names, weights = None, None, None
+    coord_lines = sections.get('NODE_COORD_SECTION') or sections.get('DISPLAY_DATA_SECTION')
+    if coord_lines:
+        table = np.array(' '.join(coord_lines).split(), dtype=float).reshape(-1, 3)[:n]
+        names = table[:, 0].astype(np.int64).astype(str)
+        coords = table[:, 1:3]
+    if edge_weight_type == 'EXPLICIT':
+        values = np.array(' '.join(sections['EDGE_WEIGHT_SECTION']).split(), dtype=float)
+        weights = _expand_weights(values, n, header.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX').upper())
+    return TSPInstance(coords, names, edge_weight_type, weights, name=header.get('NAME'))
+
+
+def _cache_paths(file_path, cache_dir):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR)
+    base = os.path.join(cache_dir, os.path.basename(file_path))
+    return {kind: f'{base}.{kind}.npy' for kind in ('coords', 'names', 'weights')}, f'{base}.json'
+
+
+def _write_replace(file_path, write):
+    # Ghi ra file tạm riêng của tiến trình rồi đổi tên: tiến trình khác đang ánh xạ bộ nhớ
+    # file cũ vẫn đọc được nó, và nhiều tiến trình cùng ghi không ghi đè dở dang lên nhau
+    temp_path = f'{file_path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            write(f)
+        os.replace(temp_path, file_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _store_cache(instance, source, arrays, meta_path):
+    os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+    stored = []
+    for kind, value in (('coords', instance.coords), ('names', instance._names), ('weights', instance.weights)):
+        if value is not None:
+            _write_replace(arrays[kind], lambda f: np.save(f, np.ascontiguousarray(value)))
+            stored.append(kind)
+    # File mô tả được ghi sau cùng nên các file .npy nó trỏ tới luôn đã đầy đủ
+    meta = {'source': source, 'arrays': stored, 'edge_weight_type': instance.edge_weight_type, 'name': instance.name}
+    _write_replace(meta_path, lambda f: f.write(json.dumps(meta).encode()))
+
+
+def load_instance(file_path, cache=True, cache_dir=None):
+    # Lần đầu đọc file gốc (.tsp theo TSPLIB, còn lại là CSV) rồi lưu mảng ra .npy;
+    # các lần sau nạp lại bằng ánh xạ bộ nhớ nếu file gốc không thay đổi
+    stat = os.stat(file_path)
+    source = {'version': CACHE_VERSION, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    arrays, meta_path = _cache_paths(file_path, cache_dir)
+
+    if cache and os.path.exists(meta_path):
+        # Bộ nhớ đệm hỏng hoặc thiếu file thì đọc lại file gốc
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta['source'] == source:
+                loaded = {kind: np.load(path, mmap_mode='r') if kind in meta['arrays'] else None
+                          for kind, path in arrays.items()}
+                return TSPInstance(loaded['coords'], loaded['names'], meta['edge_weight_type'],
+                                   loaded['weights'], name=meta['name'])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    if os.path.splitext(file_path)[1].lower() == '.tsp':
+        instance = load_tsplib(file_path)
+    else:
+        instance = load_csv(file_path)
+
+    if cache:
+        # Bộ nhớ đệm chỉ để tăng tốc: thư mục chỉ đọc hoặc lỗi ghi không làm hỏng việc nạp bài toán
+        try:
+            _store_cache(instance, source, arrays, meta_path)
+        except OSError:
+            pass
+    return instance
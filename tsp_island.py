@@ -0,0 +1,117 @@
+import time
+import multiprocessing as mp
+import numpy as np
+from tsp_instance import TSPInstance
+
+
+TOPOLOGIES = ['ring', 'fully_connected']
+
+
+def _island_worker(conn, ga, cities):
+    # Mỗi đảo sống trong một tiến trình riêng, chỉ các cá thể di cư được gửi qua pipe
+    ga.select_population(cities)
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        generations, immigrants, immigrants_fitness, migration_size = message
+
+        # Người nhập cư thay thế các cá thể kém nhất của đảo
+        if len(immigrants):
+            worst = np.argsort(ga.fitness)[:len(immigrants)]
+            ga.population[worst] = immigrants
+            ga.fitness[worst] = immigrants_fitness
+            ga.update_best()
+
+        for _ in range(generations):
+            ga.step()
+
+        # Quần thể không giữ cá thể ưu tú nên gửi kèm tour tốt nhất từ trước đến nay của đảo
+        top = np.argsort(ga.fitness)[-migration_size:]
+        conn.send((ga.population[top], ga.fitness[top], ga.best_state, ga.best_fitness))
+    conn.close()
+
+
+class IslandModel:
+    def __init__(self, islands, migration_interval=10, migration_size=1, topology='ring'):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown migration topology: {topology}")
+        # islands là danh sách các GA, mỗi GA có thể có cấu hình lai ghép/đột biến riêng
+        self.islands = islands
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.topology = topology
+        self.gen_number = 0
+        self.fittest = -np.inf
+        self.best = None
+        self.elapsed_time = 0
+        self.generations_per_second = 0
+
+    def neighbors(self, island):
+        # Các đảo gửi người di cư đến đảo "island"
+        n_islands = len(self.islands)
+        if n_islands == 1:
+            return []
+        if self.topology == 'ring':
+            return [(island - 1) % n_islands]
+        elif self.topology == 'fully_connected':
+            return [i for i in range(n_islands) if i != island]
+
+    def migrate(self, emigrants):
+        migrations = []
+        for island in range(len(self.islands)):
+            sources = self.neighbors(island)
+            if sources:
+                states = np.concatenate([emigrants[i][0] for i in sources])
+                fitness = np.concatenate([emigrants[i][1] for i in sources])
+            else:
+                states, fitness = np.empty((0, 0), dtype=np.intp), np.empty(0)
+            migrations.append((states, fitness))
+        return migrations
+
+    def run(self, cities, generations=None):
+        if generations is None:
+            generations = self.islands[0].iterations_limit
+        if generations < 1:
+            raise ValueError(f"generations must be at least 1, got {generations}")
+        instance = cities if isinstance(cities, TSPInstance) else TSPInstance.from_cities(cities)
+
+        connections = []
+        processes = []
+        for ga in self.islands:
+            parent_conn, child_conn = mp.Pipe()
+            process = mp.Process(target=_island_worker, args=(child_conn, ga, instance), daemon=True)
+            process.start()
+            child_conn.close()
+            connections.append(parent_conn)
+            processes.append(process)
+
+        start_time = time.time()
+        emigrants = None
+        try:
+            self.gen_number = 0
+            while self.gen_number < generations:
+                step = min(self.migration_interval, generations - self.gen_number)
+                if emigrants is None:
+                    migrations = [(np.empty((0, 0), dtype=np.intp), np.empty(0))] * len(self.islands)
+                else:
+                    migrations = self.migrate(emigrants)
+                for conn, (states, fitness) in zip(connections, migrations):
+                    conn.send((step, states, fitness, self.migration_size))
+                emigrants = [conn.recv() for conn in connections]
+                self.gen_number += step
+
+                for _, _, best_state, best_fitness in emigrants:
+                    if best_fitness > self.fittest:
+                        self.fittest = best_fitness
+                        self.best = best_state
+        finally:
+            for conn in connections:
+                conn.send(None)
+                conn.close()
+            for process in processes:
+                process.join()
+
+        self.elapsed_time = time.time() - start_time
+        self.generations_per_second = self.gen_number * len(self.islands) / self.elapsed_time
+        return [self.fittest, [instance.cities[i] for i in self.best]], self.generations_per_second
@@ -0,0 +1,178 @@
+from collections import deque
+import numpy as np
+
+
+LOCAL_SEARCH_TYPES = ['2opt', 'oropt', 'both']
+
+EPSILON = 1e-9
+
+
+def nearest_neighbors(distance_matrix, k):
+    # Danh sách k thành phố gần nhất của mỗi thành phố, sắp xếp theo khoảng cách tăng dần
+    if hasattr(distance_matrix, 'nearest_neighbors'):
+        return distance_matrix.nearest_neighbors(k)
+    n = len(distance_matrix)
+    k = min(k, n - 1)
+    d = np.array(distance_matrix, dtype=float)
+    np.fill_diagonal(d, np.inf)
+    candidates = np.argpartition(d, k - 1, axis=1)[:, :k] if k < n - 1 else np.argsort(d, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(d, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def _reverse(tour, pos, i, j):
+    # Đảo đoạn vòng tròn từ vị trí i đến j (tính cả hai đầu), chọn phía ngắn hơn để đảo
+    n = len(tour)
+    length = (j - i) % n + 1
+    if length * 2 > n:
+        i, j = (j + 1) % n, (i - 1) % n
+        length = n - length
+    for _ in range(length // 2):
+        a, b = tour[i], tour[j]
+        tour[i], tour[j] = b, a
+        pos[a], pos[b] = j, i
+        i = (i + 1) % n
+        j = (j - 1) % n
+
+
+def two_opt(tour, dist, neighbors):
+    # 2-opt với danh sách láng giềng và bit "don't look": mỗi nước đi được đánh giá
+    # trong O(1) bằng chênh lệch của hai cạnh bị thay thế.
+    # tour là list được sửa tại chỗ, trả về độ thay đổi tổng quãng đường (<= 0)
+    n = len(tour)
+    if n < 4:
+        return 0.0
+    pos = [0] * n
+    for i, city in enumerate(tour):
+        pos[city] = i
+    queue = deque(tour)
+    queued = [False] * n
+    for city in queue:
+        queued[city] = True
+
+    total = 0.0
+    while queue:
+        a = queue.popleft()
+        queued[a] = False
+        improved = False
+        for forward in (True, False):
+            i = pos[a]
+            b = tour[(i + 1) % n] if forward else tour[(i - 1) % n]
+            d_ab = dist[a, b]
+            for c in neighbors[a]:
+                d_ac = dist[a, c]
+                if d_ac >= d_ab:
+                    break
+                j = pos[c]
+                d = tour[(j + 1) % n] if forward else tour[(j - 1) % n]
+                if c == b or d == a:
+                    continue
+                delta = d_ac + dist[b, d] - d_ab - dist[c, d]
+                if delta < -EPSILON:
+                    if forward:
+                        _reverse(tour, pos, pos[b], j)
+                    else:
+                        _reverse(tour, pos, i, pos[d])
+                    total += delta
+                    for city in (a, b, c, d):
+                        if not queued[city]:
+                            queued[city] = True
+                            queue.append(city)
+                    improved = True
+                    break
+            if improved:
+                break
+    return total
+
+
+def or_opt(tour, dist, neighbors, max_segment=3):
+    # Or-opt: di chuyển một đoạn 1..max_segment thành phố đến cạnh (c, succ(c)) với c là
+    # láng giềng của đầu đoạn, có thể đảo chiều đoạn. Trả về độ thay đổi quãng đường (<= 0)
+    n = len(tour)
+    if n < 5:
+        return 0.0
+    pos = [0] * n
+    for i, city in enumerate(tour):
+        pos[city] = i
+    queue = deque(tour)
+    queued = [False] * n
+    for city in queue:
+        queued[city] = True
+
+    total = 0.0
+    while queue:
+        s1 = queue.popleft()
+        queued[s1] = False
+        move = None
+        for length in range(1, min(max_segment, n - 3) + 1):
+            i = pos[s1]
+            se = tour[(i + length - 1) % n]
+            p = tour[(i - 1) % n]
+            nx = tour[(i + length) % n]
+            removed = dist[p, s1] + dist[se, nx] - dist[p, nx]
+            segment = {tour[(i + k) % n] for k in range(length)}
+            for end in (s1, se):
+                for c in neighbors[end]:
+                    d_c = dist[end, c]
+                    if d_c >= removed:
+                        break
+                    if c in segment:
+                        continue
+                    # Chèn đoạn vào giữa c và thành phố kề với c theo cả hai phía
+                    for e in (tour[(pos[c] + 1) % n], tour[(pos[c] - 1) % n]):
+                        if e in segment:
+                            continue
+                        # end nằm cạnh c, đầu còn lại của đoạn nằm cạnh e
+                        other = se if end == s1 else s1
+                        delta = d_c + dist[other, e] - dist[c, e] - removed
+                        if delta < -EPSILON:
+                            move = (length, c, e, end, p, nx, delta)
+                            break
+                    if move:
+                        break
+                if move:
+                    break
+            if move:
+                break
+
+        if move:
+            length, c, e, end, p, nx, delta = move
+            i = pos[s1]
+            rotated = tour[i:] + tour[:i]
+            segment, rest = rotated[:length], rotated[length:]
+            # Sắp xếp để đoạn đi theo thứ tự c, end, ..., other, e trên tour mới
+            k = rest.index(c)
+            if rest[(k + 1) % len(rest)] == e:
+                inserted = segment if end == s1 else segment[::-1]
+                rest[k + 1:k + 1] = inserted
+            else:
+                inserted = segment[::-1] if end == s1 else segment
+                rest[k:k] = inserted
+            tour[:] = rest
+            for idx, city in enumerate(tour):
+                pos[city] = idx
+            total += delta
+            for city in (s1, segment[-1], c, e, p, nx):
+                if not queued[city]:
+                    queued[city] = True
+                    queue.append(city)
+    return total
+
+
+def improve_tour(state, dist, neighbors, local_search='both'):
+    # Áp dụng 2-opt và/hoặc Or-opt luân phiên đến khi không còn cải thiện,
+    # state (mảng chỉ số) được sửa tại chỗ, trả về độ thay đổi quãng đường
+    tour = [int(city) for city in state]
+    neighbors = neighbors.tolist() if isinstance(neighbors, np.ndarray) else neighbors
+    total = 0.0
+    while True:
+        delta = 0.0
+        if local_search in ('2opt', 'both'):
+            delta += two_opt(tour, dist, neighbors)
+        if local_search in ('oropt', 'both'):
+            delta += or_opt(tour, dist, neighbors)
+        total += delta
+        if local_search != 'both' or delta > -EPSILON:
+            break
+    state[:] = tour
+    return total
@@ -0,0 +1,389 @@
+import json
+import time
+import signal
+import asyncio
+import argparse
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from urllib.parse import urlsplit
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.managers import SyncManager
+import numpy as np
+from tsp_ga import GA
+from tsp_instance import TSPInstance
+from tsp_cli import GA_OPTIONS, RUN_OPTIONS, CHOICES
+
+
+FINISHED = ('done', 'cancelled', 'failed')
+REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           409: 'Conflict', 413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _ignore_sigint():
+    # Ctrl+C chỉ dừng tiến trình chính, tiến trình này tự đóng pool và Manager
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run_job(job_id, coords, names, ga_options, run_options, progress, cancel, progress_interval=1):
+    # Chạy trong tiến trình của pool: gửi (job_id, bản ghi) vào hàng đợi progress sau mỗi
+    # progress_interval thế hệ, dừng khi sự kiện cancel được đặt. Cuối cùng gửi (job_id, None)
+    # để báo không còn bản ghi tiến độ nào nữa
+    def report(ga):
+        if ga.gen_number % progress_interval == 0:
+            progress.put((job_id, {'generation': ga.gen_number, 'fittest': float(ga.fittest),
+                                   'average': float(ga.calc_avr_fitness(ga.fitness))}))
+        return cancel.is_set()
+
+    try:
+        instance = TSPInstance(np.asarray(coords, dtype=float), np.asarray(names, dtype=str))
+        ga = GA(**ga_options)
+        result = ga.run(instance, callback=report, **run_options)
+    finally:
+        progress.put((job_id, None))
+    return {
+        'distance': result['distance'],
+        'tour': result['tour'],
+        'generations': result['generations'],
+        'evaluations': result['evaluations'],
+        'elapsed': result['elapsed'],
+        'stop_reason': result['stop_reason']
+    }
+
+
+def parse_job(body, max_time_budget=None):
+    # Thân yêu cầu POST /jobs:
+    # {"cities": [[tên, x, y], ...]} hoặc {"coords": [[x, y], ...], "names": [...]},
+    # "params": {tham số GA}, cùng các tùy chọn dừng của GA.run (time_budget, stall_generations, ...)
+    try:
+        request = json.loads(body)
+    except ValueError:
+        raise HTTPError(400, "Request body is not valid JSON")
+    if not isinstance(request, dict):
+        raise HTTPError(400, "Request body must be a JSON object")
+
+    try:
+        if 'cities' in request:
+            names = [str(city[0]) for city in request['cities']]
+            coords = [(float(city[1]), float(city[2])) for city in request['cities']]
+        else:
+            coords = [(float(x), float(y)) for x, y in request['coords']]
+            names = [str(name) for name in request.get('names', range(1, len(coords) + 1))]
+    except (KeyError, IndexError, TypeError, ValueError):
+        raise HTTPError(400, "Give 'cities' as [name, x, y] rows or 'coords' as [x, y] rows")
+    if len(coords) < 3 or len(names) != len(coords):
+        raise HTTPError(400, "A job needs at least 3 cities and one name per city")
+
+    params = request.get('params', {})
+    run_options = {name: value for name, value in request.items()
+                   if name not in ('cities', 'coords', 'names', 'params')}
+    # Dịch vụ không ghi checkpoint nên checkpoint_interval không phải tùy chọn hợp lệ
+    unknown = (set(params) - set(GA_OPTIONS)) | (set(run_options) - (set(RUN_OPTIONS) - {'checkpoint_interval'}))
+    if unknown:
+        raise HTTPError(400, f"Unknown options: {', '.join(sorted(unknown))}")
+    try:
+        ga_options = {name: GA_OPTIONS[name](value) for name, value in params.items()}
+        run_options = {name: RUN_OPTIONS[name](value) for name, value in run_options.items()}
+    except (TypeError, ValueError) as error:
+        raise HTTPError(400, f"Invalid option value: {error}")
+    for name, choices in CHOICES.items():
+        if name in ga_options and ga_options[name] not in choices:
+            raise HTTPError(400, f"{name} must be one of {', '.join(choices)}")
+
+    # Mỗi công việc có giới hạn thời gian, không vượt quá giới hạn của dịch vụ
+    if max_time_budget is not None:
+        run_options['time_budget'] = min(run_options.get('time_budget', max_time_budget), max_time_budget)
+    return coords, names, ga_options, run_options
+
+
+class Job:
+    def __init__(self, job_id, coords, names, ga_options, run_options):
+        self.id = job_id
+        self.coords = coords
+        self.names = names
+        self.ga_options = ga_options
+        self.run_options = run_options
+        self.status = 'queued'
+        self.submitted = time.time()
+        self.result = None
+        self.error = None
+        self.progress = []
+        self.progress_closed = False
+        self.cancel = None
+        self.changed = asyncio.Condition()
+
+    def summary(self):
+        latest = self.progress[-1] if self.progress else {}
+        return {
+            'id': self.id,
+            'status': self.status,
+            'cities': len(self.coords),
+            'generation': latest.get('generation', 0),
+            'fittest': latest.get('fittest'),
+            'average': latest.get('average'),
+            'result': self.result,
+            'error': self.error
+        }
+
+    async def notify(self):
+        async with self.changed:
+            self.changed.notify_all()
+
+
+class SolverService:
+    # Dịch vụ HTTP trên localhost (hoặc Unix socket):
+    # - POST /jobs: thêm công việc vào hàng đợi, 503 khi hàng đợi đầy
+    # - GET /jobs, GET /jobs/<id>: trạng thái và kết quả
+    # - GET /jobs/<id>/progress: luồng NDJSON các bản ghi thế hệ (generation, fittest, average)
+    # - DELETE /jobs/<id>: hủy công việc đang chờ hoặc đang chạy
+    # Các công việc chạy trên pool tối đa max_workers tiến trình, tối đa queue_size công việc chờ.
+    # Chỉ keep_jobs công việc đã kết thúc gần nhất (cùng tiến độ của chúng) được giữ lại
+    def __init__(self, max_workers=2, queue_size=8, max_time_budget=300.0, progress_interval=1,
+                 max_body=16 * 1024 * 1024, keep_jobs=100):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.max_time_budget = max_time_budget
+        self.progress_interval = progress_interval
+        self.max_body = max_body
+        self.keep_jobs = keep_jobs
+        self.jobs = {}
+        self.finished = deque()
+        self.ids = itertools.count(1)
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8765, unix_path=None):
+        self.loop = asyncio.get_running_loop()
+        self.pending = asyncio.Queue(self.queue_size)
+        # Pool tạo tiến trình khi có công việc đầu tiên, lúc máy chủ đang mở socket. Dùng 'spawn'
+        # để tiến trình con không thừa hưởng socket lắng nghe và kết nối của máy chủ
+        context = multiprocessing.get_context('spawn')
+        self.pool = ProcessPoolExecutor(self.max_workers, mp_context=context, initializer=_ignore_sigint)
+        self.manager = SyncManager(ctx=context)
+        self.manager.start(_ignore_sigint)
+        self.progress = self.manager.Queue()
+        self.pump = threading.Thread(target=self._pump_progress, daemon=True)
+        self.pump.start()
+        self.dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.max_workers)]
+        if unix_path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, unix_path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await asyncio.gather(*(self.loop.run_in_executor(None, job.cancel.set)
+                               for job in self.jobs.values() if job.status == 'running'))
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        self.pool.shutdown(wait=True)
+        self.progress.put(None)
+        self.pump.join()
+        self.manager.shutdown()
+
+    def _pump_progress(self):
+        # Luồng nền chuyển các bản ghi tiến độ từ hàng đợi của Manager sang vòng lặp sự kiện
+        while True:
+            item = self.progress.get()
+            if item is None:
+                return
+            self.loop.call_soon_threadsafe(self._record_progress, *item)
+
+    def _record_progress(self, job_id, record):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        if record is None:
+            job.progress_closed = True
+        else:
+            job.progress.append(record)
+        asyncio.ensure_future(job.notify())
+
+    async def _dispatch(self):
+        # Các lời gọi tới Manager (IPC chặn) chạy trên luồng của executor mặc định. Sự kiện hủy
+        # được tạo trước khi nhận công việc để công việc 'running' luôn có job.cancel
+        cancel = None
+        while True:
+            if cancel is None:
+                cancel = await self.loop.run_in_executor(None, self.manager.Event)
+            job = await self.pending.get()
+            if job.status != 'queued':
+                continue
+            job.status = 'running'
+            job.cancel, cancel = cancel, None
+            await job.notify()
+            try:
+                job.result = await self.loop.run_in_executor(
+                    self.pool, run_job, job.id, job.coords, job.names, job.ga_options, job.run_options,
+                    self.progress, job.cancel, self.progress_interval)
+                job.status = 'cancelled' if job.result['stop_reason'] == 'cancelled' else 'done'
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                job.status = 'failed'
+                job.error = f'{type(error).__name__}: {error}'
+                job.progress_closed = True
+            self._finish(job)
+            await job.notify()
+
+    def _finish(self, job):
+        # Bỏ các công việc đã kết thúc cũ nhất khi có quá keep_jobs công việc đã kết thúc
+        self.finished.append(job.id)
+        while len(self.finished) > self.keep_jobs:
+            del self.jobs[self.finished.popleft()]
+
+    def submit(self, body):
+        coords, names, ga_options, run_options = parse_job(body, self.max_time_budget)
+        if self.pending.full():
+            raise HTTPError(503, "The job queue is full, retry later")
+        job = Job(str(next(self.ids)), coords, names, ga_options, run_options)
+        self.jobs[job.id] = job
+        self.pending.put_nowait(job)
+        return job
+
+    async def cancel(self, job):
+        if job.status in FINISHED:
+            raise HTTPError(409, f"Job {job.id} has already finished")
+        if job.status == 'queued':
+            job.status = 'cancelled'
+            job.progress_closed = True
+            self._finish(job)
+        else:
+            await self.loop.run_in_executor(None, job.cancel.set)
+        await job.notify()
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                method, target, body = await self.read_request(reader)
+                await self.route(method, urlsplit(target).path, body, writer)
+            except HTTPError as error:
+                headers = {'Retry-After': '1'} if error.status == 503 else {}
+                self.respond(writer, error.status, {'error': str(error)}, headers)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) != 3:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > self.max_body:
+            raise HTTPError(413, f"Request body is larger than {self.max_body} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return request_line[0].upper(), request_line[1], body
+
+    async def route(self, method, path, body, writer):
+        parts = [part for part in path.split('/') if part]
+        if not parts or parts[0] != 'jobs' or len(parts) > 3 or (len(parts) == 3 and parts[2] != 'progress'):
+            raise HTTPError(404, f"No such resource: {path}")
+        if len(parts) == 1:
+            if method == 'POST':
+                job = self.submit(body)
+                self.respond(writer, 202, job.summary(), {'Location': f'/jobs/{job.id}'})
+            elif method == 'GET':
+                self.respond(writer, 200, [job.summary() for job in self.jobs.values()])
+            else:
+                raise HTTPError(405, f"{method} is not allowed on /jobs")
+            return
+
+        job = self.jobs.get(parts[1])
+        if job is None:
+            raise HTTPError(404, f"No such job: {parts[1]}")
+        if len(parts) == 3:
+            if method != 'GET':
+                raise HTTPError(405, f"{method} is not allowed on {path}")
+            await self.stream_progress(job, writer)
+        elif method == 'GET':
+            self.respond(writer, 200, job.summary())
+        elif method == 'DELETE':
+            await self.cancel(job)
+            self.respond(writer, 200, job.summary())
+        else:
+            raise HTTPError(405, f"{method} is not allowed on {path}")
+
+    def respond(self, writer, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        head = [f'HTTP/1.1 {status} {REASONS[status]}', 'Content-Type: application/json',
+                f'Content-Length: {len(body)}', 'Connection: close']
+        head.extend(f'{name}: {value}' for name, value in (headers or {}).items())
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+
+    async def stream_progress(self, job, writer):
+        # Gửi các bản ghi đã có rồi chờ bản ghi mới (chunked transfer encoding, mỗi dòng một
+        # đối tượng JSON); dòng cuối là trạng thái của công việc khi không còn tiến độ
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n'
+                     b'Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n')
+        sent = 0
+        while True:
+            async with job.changed:
+                await job.changed.wait_for(lambda: len(job.progress) > sent or
+                                           (job.progress_closed and job.status in FINISHED))
+            records = job.progress[sent:]
+            sent += len(records)
+            closed = job.progress_closed and job.status in FINISHED and sent == len(job.progress)
+            if closed:
+                records = records + [job.summary()]
+            if records:
+                chunk = ''.join(json.dumps(record) + '\n' for record in records).encode()
+                writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                await writer.drain()
+            if closed:
+                break
+        writer.write(b'0\r\n\r\n')
+
+
+async def serve(args):
+    service = SolverService(args.workers, args.queue_size, args.max_time_budget, args.progress_interval,
+                            keep_jobs=args.keep_jobs)
+    server = await service.start(args.host, args.port, args.unix)
+    where = args.unix or f'http://{args.host}:{args.port}'
+    print(f"Serving TSP jobs on {where}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP service that solves TSP jobs with the genetic algorithm")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="listen on this Unix socket path instead of TCP")
+    parser.add_argument('--workers', type=int, default=2, help="number of worker processes")
+    parser.add_argument('--queue-size', type=int, default=8, help="waiting jobs accepted before answering 503")
+    parser.add_argument('--max-time-budget', type=float, default=300.0, help="upper bound on each job's seconds")
+    parser.add_argument('--progress-interval', type=int, default=1, help="report progress every this many generations")
+    parser.add_argument('--keep-jobs', type=int, default=100, help="finished jobs kept for GET before being dropped")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
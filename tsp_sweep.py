@@ -0,0 +1,134 @@
+import os
+import csv
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tsp_ga import GA
+from tsp_instance import load_instance
+
+
+population_sizes = [100, 500, 1000]
+crossover_rates = [0.7, 0.8, 0.9]
+mutation_rates = [0.05, 0.1, 0.2]
+crossover_types = ['OX', 'PMX', 'CX']
+mutation_types = ['swap', 'inversion', 'scramble', 'insertion']
+
+CONFIG_FIELDS = ['Population Size', 'Mutation Rate', 'Crossover Rate', 'Crossover Type', 'Mutation Type', 'Seed']
+FIELDNAMES = CONFIG_FIELDS + ['Fitness', 'Average Fitness', 'Time']
+
+_cities = None
+_run_options = {}
+
+
+def grid_configs(seeds):
+    configs = []
+    for pop_size, mu_rate, cross_rate, cross_type, mu_type in itertools.product(
+            population_sizes, mutation_rates, crossover_rates, crossover_types, mutation_types):
+        for seed in seeds:
+            configs.append({
+                'Population Size': pop_size,
+                'Mutation Rate': mu_rate,
+                'Crossover Rate': cross_rate,
+                'Crossover Type': cross_type,
+                'Mutation Type': mu_type,
+                'Seed': seed
+            })
+    return configs
+
+
+def random_configs(n_samples, seeds, sweep_seed=0):
+    # Lấy mẫu không lặp trên lưới để mỗi cấu hình chỉ xuất hiện một lần và
+    # danh sách giống hệt nhau giữa các lần chạy (cần cho việc chạy tiếp)
+    grid = grid_configs([None])
+    samples = random.Random(sweep_seed).sample(grid, min(n_samples, len(grid)))
+    return [dict(config, Seed=seed) for config in samples for seed in seeds]
+
+
+def config_key(row):
+    # Khóa so sánh theo chuỗi vì các hàng đọc lại từ CSV đều là chuỗi
+    return tuple(str(row[field]) for field in CONFIG_FIELDS)
+
+
+def completed_keys(file_path):
+    if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+        return set()
+    with open(file_path, newline='') as csvfile:
+        reader = csv.DictReader(csvfile)
+        if reader.fieldnames != FIELDNAMES:
+            raise ValueError(f"{file_path} has columns {reader.fieldnames}, expected {FIELDNAMES}")
+        return {config_key(row) for row in reader}
+
+
+def _init_worker(instance_path, run_options):
+    global _cities, _run_options
+    _cities = load_instance(instance_path)
+    _run_options = run_options
+
+
+def run_config(config):
+    ga = GA(population_size=config['Population Size'], mutation_rate=config['Mutation Rate'],
+            crossover_rate=config['Crossover Rate'], crossover_type=config['Crossover Type'],
+            mutation_type=config['Mutation Type'], seed=config['Seed'])
+    ga.select_population(_cities)
+
+    # Dừng sớm theo các tùy chọn của lần quét (không cải thiện, hết thời gian). Fitness là của
+    # tour tốt nhất mà run() trả về, không phải cá thể tốt nhất của thế hệ cuối (không giữ ưu tú)
+    result = ga.run(**_run_options)
+
+    return dict(config, **{
+        'Fitness': result['fitness'],
+        'Average Fitness': ga.calc_avr_fitness(ga.fitness),
+        'Time': result['elapsed']
+    })
+
+
+def sweep(configs, instance_path, output_path, max_workers=None, run_options=None):
+    # Bỏ qua các cấu hình đã có trong file kết quả, ghi từng hàng ngay khi hoàn thành
+    done = completed_keys(output_path)
+    pending = [config for config in configs if config_key(config) not in done]
+    write_header = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+
+    with open(output_path, 'a', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+        if write_header:
+            writer.writeheader()
+            csvfile.flush()
+
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(instance_path, run_options or {})) as pool:
+            futures = [pool.submit(run_config, config) for config in pending]
+            for future in as_completed(futures):
+                writer.writerow(future.result())
+                csvfile.flush()
+
+    return len(pending)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep for the TSP genetic algorithm")
+    parser.add_argument('--mode', choices=['random', 'grid'], default='random')
+    parser.add_argument('--samples', type=int, default=150, help="number of sampled configurations in random mode")
+    parser.add_argument('--seeds', type=int, default=1, help="number of seeds per configuration")
+    parser.add_argument('--sweep-seed', type=int, default=0, help="seed used to sample configurations in random mode")
+    parser.add_argument('--instance', default='TSP_35.csv')
+    parser.add_argument('--output', default='tsp_ga_results.csv')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--stall-generations', type=int, default=None,
+                        help="stop a configuration after this many generations without improvement")
+    parser.add_argument('--time-budget', type=float, default=None, help="wall-clock seconds per configuration")
+    args = parser.parse_args(argv)
+
+    seeds = list(range(args.seeds))
+    if args.mode == 'grid':
+        configs = grid_configs(seeds)
+    else:
+        configs = random_configs(args.samples, seeds, args.sweep_seed)
+
+    run_options = {'stall_generations': args.stall_generations, 'time_budget': args.time_budget}
+    count = sweep(configs, args.instance, args.output, args.workers, run_options)
+    print(f"Ran {count} of {len(configs)} configurations, results in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
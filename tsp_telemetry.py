@@ -0,0 +1,34 @@
+import os
+import csv
+import json
+
+
+class TelemetryWriter:
+    # Observer ghi mỗi bản ghi thế hệ của GA ra file CSV hoặc JSONL (chọn theo đuôi file)
+    def __init__(self, file_path, format=None):
+        if format is None:
+            format = 'csv' if os.path.splitext(file_path)[1].lower() == '.csv' else 'jsonl'
+        if format not in ('csv', 'jsonl'):
+            raise ValueError(f"Unknown telemetry format: {format}")
+        self.format = format
+        self.file = open(file_path, 'w', newline='')
+        self.writer = None
+
+    def __call__(self, record):
+        if self.format == 'jsonl':
+            self.file.write(json.dumps(record) + '\n')
+        else:
+            if self.writer is None:
+                self.writer = csv.DictWriter(self.file, fieldnames=list(record), extrasaction='ignore')
+                self.writer.writeheader()
+            self.writer.writerow(record)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,13 +1,86 @@
 import sys
 import time
+import threading
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, 
-    QPushButton, QLabel, QGridLayout, QComboBox, QSpinBox, QDoubleSpinBox
+    QPushButton, QLabel, QGridLayout, QComboBox, QSpinBox, QDoubleSpinBox, QFileDialog
 )
 from PyQt5.QtCore import QTimer
 from tsp_ga import City, GA
+from tsp_checkpoint import CheckpointWriter, load_checkpoint
+
+
+class SolverWorker(threading.Thread):
+    # Chạy GA trên luồng riêng. Giao diện chỉ đọc ảnh chụp mới nhất theo tốc độ khung hình
+    # cố định nên các thế hệ trung gian bị bỏ qua khi việc vẽ không theo kịp
+    def __init__(self, ga):
+        super().__init__(daemon=True)
+        self.ga = ga
+        self.lock = threading.Lock()
+        self.running = threading.Event()
+        self.running.set()
+        self.stopped = threading.Event()
+        self.finished = threading.Event()
+        self.fitness_values = []
+        self.avr_values = []
+        self.snapshot = None
+        # Checkpoint được chụp trên luồng này giữa hai thế hệ (tự động mỗi interval thế hệ của
+        # writer, hoặc ngay khi giao diện yêu cầu) và ghi trên luồng nền của CheckpointWriter
+        self.checkpoint = None
+        self.checkpoint_requested = threading.Event()
+
+    def done(self):
+        return self.ga.gen_number >= self.ga.iterations_limit or self.ga.fittest >= self.ga.target
+
+    def run(self):
+        # GA mở từ checkpoint có thể đã kết thúc sẵn
+        while not self.stopped.is_set() and not self.done():
+            if self.checkpoint_requested.is_set():
+                self.checkpoint_requested.clear()
+                self.checkpoint.submit(self.ga, force=True)
+            if not self.running.wait(0.1):
+                continue
+            solution, avr = self.ga.evolve()
+            if self.checkpoint is not None:
+                self.checkpoint.submit(self.ga)
+            with self.lock:
+                self.fitness_values.append(self.ga.fittest)
+                self.avr_values.append(avr)
+                self.snapshot = (self.ga.gen_number, self.ga.fittest, solution[1])
+            if self.done():
+                break
+        if self.checkpoint is not None:
+            self.checkpoint.submit(self.ga, force=True)
+        self.finished.set()
+
+    def save_checkpoint(self, writer):
+        # Đổi file checkpoint và ghi ngay; nếu GA đã kết thúc thì không còn chạy nên chụp trực tiếp
+        previous, self.checkpoint = self.checkpoint, writer
+        if previous is not None:
+            previous.close()
+        if self.finished.is_set():
+            writer.submit(self.ga, force=True)
+        else:
+            self.checkpoint_requested.set()
+
+    def latest(self):
+        with self.lock:
+            return self.snapshot, list(self.fitness_values), list(self.avr_values)
+
+    def pause(self):
+        self.running.clear()
+
+    def resume(self):
+        self.running.set()
+
+    def stop(self):
+        self.stopped.set()
+        self.running.set()
+        self.join()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
 
 
 class TSPApp(QMainWindow):
@@ -24,6 +97,13 @@ class TSPApp(QMainWindow):
 
         self.fitness_values = []
         self.avr_values = []
+        self.ga = None
+        self.worker = None
+        self.rendered_gen = 0
+        # Thế hệ đầu tiên của lịch sử đang vẽ (khác 0 khi chạy tiếp từ checkpoint)
+        self.history_start = 0
+        # Sau khi lưu hoặc mở checkpoint, GA tự ghi lại vào file đó mỗi checkpoint_interval thế hệ
+        self.checkpoint_interval = 50
         
         layout = QGridLayout(centralWidget)
 
@@ -97,6 +177,14 @@ class TSPApp(QMainWindow):
         buttonLayout.addWidget(self.stopButton)
         buttonLayout.addWidget(self.continueButton)
         formLayout.addRow(buttonLayout)
+        self.saveButton = QPushButton("Save Checkpoint")
+        self.resumeButton = QPushButton("Resume Checkpoint")
+        self.saveButton.clicked.connect(self.save_checkpoint)
+        self.resumeButton.clicked.connect(self.resume_checkpoint)
+        checkpointLayout = QHBoxLayout()
+        checkpointLayout.addWidget(self.saveButton)
+        checkpointLayout.addWidget(self.resumeButton)
+        formLayout.addRow(checkpointLayout)
 
         self.genLabel = QLabel("Current Generation: 0")
         formLayout.addRow(self.genLabel)
@@ -110,60 +198,77 @@ class TSPApp(QMainWindow):
         # Load cities
         self.cities = City.get_cities("TSP_35.csv")
         self.plot_initial_cities()
-        self.plot_fitness()
-        self.plot_avr()
-
-        # Timer for animation
+        self.init_fitness_plot(self.fitness_ax, "Fittest Value Over Generations", "Fittest Value")
+        self.init_fitness_plot(self.avr_ax, "Average Fitness Over Generations", "Average Fitness")
+        self.fitness_line, = self.fitness_ax.plot([], [], color="red", animated=True)
+        self.avr_line, = self.avr_ax.plot([], [], animated=True)
+
+        # Nền tĩnh của mỗi canvas được lưu lại sau mỗi lần vẽ đầy đủ để blit các đường động.
+        # Trục và đường được tra theo tên vì bản đồ thành phố được vẽ lại khi mở checkpoint
+        self.backgrounds = {}
+        for canvas, ax, line in ((self.city_canvas, 'city_ax', 'route_line'),
+                                 (self.fitness_canvas, 'fitness_ax', 'fitness_line'),
+                                 (self.avr_canvas, 'avr_ax', 'avr_line')):
+            canvas.mpl_connect('draw_event', lambda event, c=canvas, a=ax, l=line:
+                               self.on_draw(c, getattr(self, a), getattr(self, l)))
+
+        # Timer for rendering at a fixed frame rate
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_plot)
-        self.update_time = 20
+        self.update_time = 33
         
         # Time for elapse
         self.start_time = None
         self.elapsed_time = 0
 
     def plot_initial_cities(self):
+        # Thành phố và nhãn chỉ được vẽ một lần, lộ trình là một đường được cập nhật tại chỗ
         self.city_figure.clear()
-        ax = self.city_figure.add_subplot(111)
+        self.city_ax = self.city_figure.add_subplot(111)
         city_xs = [city.x for city in self.cities]
         city_ys = [city.y for city in self.cities]
-        ax.scatter(city_xs, city_ys, c='red', marker='o', label='Cities')
+        self.city_ax.scatter(city_xs, city_ys, c='red', marker='o', label='Cities')
         for i, city in enumerate(self.cities):
-            ax.annotate(city.name, (city.x + 0.05, city.y + 0.05))
-        ax.set_aspect('equal', adjustable='box')
+            self.city_ax.annotate(city.name, (city.x + 0.05, city.y + 0.05))
+        self.route_line, = self.city_ax.plot([], [], color='gray', linewidth=2, label='Solution Path', animated=True)
+        self.city_ax.set_aspect('equal', adjustable='box')
         self.city_canvas.draw()
 
-    def plot_fitness(self):
-        self.fitness_ax.clear()
-        self.fitness_ax.plot(range(len(self.fitness_values)), self.fitness_values, color="red")
-        self.fitness_ax.set_title("Fittest Value Over Generations")
-        self.fitness_ax.set_xlabel("Generations")
-        self.fitness_ax.set_ylabel("Fittest Value")
-        self.fitness_ax.grid(True)
+    def init_fitness_plot(self, ax, title, ylabel):
+        ax.set_title(title)
+        ax.set_xlabel("Generations")
+        ax.set_ylabel(ylabel)
+        ax.grid(True)
         # Setting fixed limits
-        try: 
-            self.fitness_ax.set_xlim(0, self.ga.iterations_limit)
-        except AttributeError:
-            self.fitness_ax.set_xlim(0, 100)
-        # self.fitness_ax.set_ylim(0, max(self.fitness_values) + 1000 if self.fitness_values else 1)
-        self.fitness_ax.set_ylim(min(self.fitness_values) if self.fitness_values else -1, 0)
-        self.fitness_canvas.draw()
+        ax.set_xlim(0, self.ga.iterations_limit if self.ga is not None else 100)
+        ax.set_ylim(-1, 0)
+
+    def on_draw(self, canvas, ax, line):
+        self.backgrounds[canvas] = canvas.copy_from_bbox(ax.bbox)
+        ax.draw_artist(line)
+
+    def blit(self, canvas, ax, line):
+        if canvas not in self.backgrounds:
+            canvas.draw()
+            return
+        canvas.restore_region(self.backgrounds[canvas])
+        ax.draw_artist(line)
+        canvas.blit(ax.bbox)
+
+    def plot_history(self, canvas, ax, line, values):
+        line.set_data(range(self.history_start, self.history_start + len(values)), values)
+        # Chỉ vẽ lại toàn bộ khi giới hạn trục phải mở rộng, còn lại chỉ blit đường
+        if values and min(values) < ax.get_ylim()[0]:
+            ax.set_ylim(min(values), 0)
+            canvas.draw()
+        else:
+            self.blit(canvas, ax, line)
+
+    def plot_fitness(self):
+        self.plot_history(self.fitness_canvas, self.fitness_ax, self.fitness_line, self.fitness_values)
 
     def plot_avr(self):
-        self.avr_ax.clear()
-        self.avr_ax.plot(range(len(self.avr_values)), self.avr_values)
-        self.avr_ax.set_title("Average Fitness Over Generations")
-        self.avr_ax.set_xlabel("Generations")
-        self.avr_ax.set_ylabel("Average Fitness")
-        self.avr_ax.grid(True)
-        # Setting fixed limits
-        try: 
-            self.avr_ax.set_xlim(0, self.ga.iterations_limit)
-        except AttributeError:
-            self.avr_ax.set_xlim(0, 100)
-        # self.avr_ax.set_ylim(0, max(self.avr_values) + 1000 if self.avr_values else 1)
-        self.avr_ax.set_ylim(min(self.avr_values) if self.avr_values else -1, 0)
-        self.avr_canvas.draw()
+        self.plot_history(self.avr_canvas, self.avr_ax, self.avr_line, self.avr_values)
 
     def start_algorithm(self):
         pop_size = self.populationInput.value()
@@ -174,66 +279,116 @@ class TSPApp(QMainWindow):
         mu_type = self.mutationType.currentText()
         target_distance = self.targetDistance.value()
         target_value = (- target_distance)
+
+        if self.worker is not None:
+            self.worker.stop()
             
         self.ga = GA(population_size=pop_size, iterations_limit=iter_limit, mutation_rate=mu_rate, 
                      crossover_rate=cross_rate, crossover_type=cross_type, mutation_type=mu_type,
                      target=target_value)
         self.ga.select_population(self.cities)
-        self.gen_number = 0
+        self.launch_worker()
+
+    def launch_worker(self, checkpoint=None):
+        # Xóa các đồ thị và chạy self.ga trên luồng mới, bắt đầu từ thế hệ hiện tại của GA
+        self.gen_number = self.ga.gen_number
+        self.rendered_gen = self.ga.gen_number
+        self.history_start = self.ga.gen_number
         self.fitness_values = []
         self.avr_values = []
+        for ax in (self.fitness_ax, self.avr_ax):
+            ax.set_xlim(0, self.ga.iterations_limit)
+            ax.set_ylim(-1, 0)
+        self.route_line.set_data([], [])
+        self.city_canvas.draw()
+        self.fitness_canvas.draw()
+        self.avr_canvas.draw()
 
         self.elapsed_time = 0  # Reset elapsed time
         self.start_time = time.time()  # Start the timer
-        self.timer.start(self.update_time)  # Update plot every "update_time" ms
+        self.worker = SolverWorker(self.ga)
+        self.worker.checkpoint = checkpoint
+        self.worker.start()
+        self.timer.start(self.update_time)  # Render every "update_time" ms
        
         QApplication.processEvents()
 
-    def update_plot(self):
-        solution, avr = self.ga.evolve()
-        self.genLabel.setText("Current Generation: " + str(self.ga.gen_number))
-        self.fittestLabel.setText(f"Fittest Value of CurGen: {self.ga.fittest:.4f}")
-        self.plot_solution(solution[1])
-
-        # Check if either the generation limit is reached or the target fitness is achieved
-        if self.ga.gen_number >= self.ga.iterations_limit or self.ga.fittest >= self.ga.target:
-            self.timer.stop()
-
-        distance = City.calc_distance(solution[1])
-        self.distanceLabel.setText(f"Shortest Distance of CurGen: {distance:.4f}") 
+    def save_checkpoint(self):
+        if self.worker is None:
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Checkpoint", "", "Checkpoints (*.npz)")
+        if file_path:
+            self.worker.save_checkpoint(CheckpointWriter(file_path, self.checkpoint_interval))
+
+    def resume_checkpoint(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Resume Checkpoint", "", "Checkpoints (*.npz)")
+        if not file_path:
+            return
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+        self.ga = load_checkpoint(file_path)
+        # Hiển thị cấu hình và các thành phố lưu trong checkpoint
+        self.populationInput.setValue(self.ga.population_size)
+        self.iterationsInput.setValue(self.ga.iterations_limit)
+        self.mutationInput.setValue(self.ga.mutation_rate)
+        self.crossoverInput.setValue(self.ga.crossover_rate)
+        self.crossoverType.setCurrentText(self.ga.crossover_type)
+        self.mutationType.setCurrentText(self.ga.mutation_type)
+        self.targetDistance.setValue(max(- self.ga.target, 0.0))
+        self.cities = self.ga.cities
+        self.plot_initial_cities()
+        self.launch_worker(CheckpointWriter(file_path, self.checkpoint_interval))
 
-        self.fitness_values.append(self.ga.fittest)
-        self.avr_values.append(avr)
+    def update_plot(self):
+        snapshot, self.fitness_values, self.avr_values = self.worker.latest()
+        finished = self.worker.finished.is_set()
+
+        if snapshot is not None and snapshot[0] != self.rendered_gen:
+            gen_number, fittest, solution = snapshot
+            self.rendered_gen = gen_number
+            self.genLabel.setText("Current Generation: " + str(gen_number))
+            self.fittestLabel.setText(f"Fittest Value of CurGen: {fittest:.4f}")
+            self.distanceLabel.setText(f"Shortest Distance of CurGen: {- fittest:.4f}") 
+            self.plot_solution(solution)
+            self.plot_fitness()
+            self.plot_avr()
 
         # Update elapsed time
         elapsed = self.elapsed_time + (time.time() - self.start_time)
         self.timeLabel.setText(f"Elapsed Time: {elapsed:.2f} seconds")
 
-        self.plot_fitness()
-        self.plot_avr()
+        # Dừng khi luồng GA đã kết thúc (đạt giới hạn thế hệ hoặc mục tiêu) và đã vẽ thế hệ cuối
+        if finished and (snapshot is None or snapshot[0] == self.rendered_gen):
+            self.elapsed_time = elapsed
+            self.start_time = None
+            self.timer.stop()
 
     def stop_update(self):
         if self.start_time is not None:
             self.elapsed_time += time.time() - self.start_time  
+            self.start_time = None
+        if self.worker is not None:
+            self.worker.pause()
         self.timer.stop()
 
     def continue_update(self):
+        if self.worker is None or self.worker.finished.is_set():
+            return
         self.start_time = time.time()  # Restart the timer
-        self.timer.start(self.update_time)  # Update plot every "update_time" ms
+        self.worker.resume()
+        self.timer.start(self.update_time)  # Render every "update_time" ms
 
     def plot_solution(self, solution):
-        self.city_figure.clear()
-        ax = self.city_figure.add_subplot(111)
-        city_xs = [city.x for city in self.cities]
-        city_ys = [city.y for city in self.cities]
-        ax.scatter(city_xs, city_ys, c='red', marker='o', label='Cities')
-        for i, city in enumerate(self.cities):
-            ax.annotate(city.name, (city.x + 0.05, city.y + 0.05)) 
         solution_xs = [city.x for city in solution]
         solution_ys = [city.y for city in solution]
-        ax.plot(solution_xs + [solution_xs[0]], solution_ys + [solution_ys[0]], color='gray', linewidth=2, label='Solution Path')
-        ax.set_aspect('equal', adjustable='box')
-        self.city_canvas.draw()
+        self.route_line.set_data(solution_xs + [solution_xs[0]], solution_ys + [solution_ys[0]])
+        self.blit(self.city_canvas, self.city_ax, self.route_line)
+
+    def closeEvent(self, event):
+        if self.worker is not None:
+            self.worker.stop()
+        super().closeEvent(event)
 
 
 def main():